@@ -9,6 +9,7 @@ from alembic import context
 from src.core.config import setting
 from src.users.models import *
 from src.files.models import *
+from src.auth.models import *
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
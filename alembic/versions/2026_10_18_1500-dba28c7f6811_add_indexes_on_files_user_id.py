@@ -0,0 +1,58 @@
+"""add indexes on files user_id
+
+Revision ID: dba28c7f6811
+Revises: 9eb53873aca5
+Create Date: 2026-10-18 15:00:34.370992
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "dba28c7f6811"
+down_revision: Union[str, None] = "9eb53873aca5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # индексы строятся без блокировки записи в таблицу files
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_files_user_id_filename",
+            "files",
+            ["user_id", "filename", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "idx_files_user_id_registered_at",
+            "files",
+            ["user_id", "registered_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_files_user_id_registered_at",
+            table_name="files",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "idx_files_user_id_filename",
+            table_name="files",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
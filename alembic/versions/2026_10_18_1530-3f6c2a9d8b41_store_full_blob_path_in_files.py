@@ -0,0 +1,36 @@
+"""store full blob path in files
+
+Revision ID: 3f6c2a9d8b41
+Revises: e1abe6d0ccb3
+Create Date: 2026-10-18 15:30:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6c2a9d8b41"
+down_revision: Union[str, None] = "e1abe6d0ccb3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE files SET path_file = path_file || '/' || blob_sha256 "
+        "WHERE blob_sha256 IS NOT NULL "
+        "AND path_file NOT LIKE '%/' || blob_sha256"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "UPDATE files "
+        "SET path_file = left(path_file, length(path_file) - length(blob_sha256) - 1) "
+        "WHERE blob_sha256 IS NOT NULL "
+        "AND path_file LIKE '%/' || blob_sha256"
+    )
@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # метрики завершившегося воркера больше не учитываются в gauge-метриках
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,105 @@
+import logging
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+from fastapi.exceptions import HTTPException
+from fastapi.responses import PlainTextResponse
+
+from src.admin.schemas import (
+    LoopStallSchemas,
+    ProfileSchemas,
+    ProfileSamplingSchemas,
+    ProfileTokenSchemas,
+)
+from src.core.config import setting
+from src.core.depends import current_superuser_user
+from src.core.loop_monitor import loop_monitor
+from src.core.profiler import (
+    PROFILE_HEADER,
+    RequestProfile,
+    create_profile_token,
+    profile_store,
+)
+from src.users.models import User
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/profiles",
+    response_model=list[ProfileSchemas],
+    status_code=status.HTTP_200_OK,
+)
+async def get_list_profiles(
+    user: User = Depends(current_superuser_user),
+):
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(
+    profile_id: UUID,
+    user: User = Depends(current_superuser_user),
+):
+    """
+    Профиль в свернутом формате (folded stacks) для flamegraph.pl, inferno
+    или speedscope
+    """
+    profile: RequestProfile | None = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile with id {profile_id} not found!",
+        )
+    return PlainTextResponse(
+        profile.folded(),
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'
+        },
+    )
+
+
+@router.post(
+    "/profiles/token",
+    response_model=ProfileTokenSchemas,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_token_profile(
+    user: User = Depends(current_superuser_user),
+):
+    token: str = await create_profile_token(id_user=user.id)
+    return ProfileTokenSchemas(token=token, header=PROFILE_HEADER)
+
+
+@router.put(
+    "/profiles/sampling",
+    response_model=ProfileSamplingSchemas,
+    status_code=status.HTTP_200_OK,
+)
+async def update_profile_sampling(
+    sampling: ProfileSamplingSchemas,
+    user: User = Depends(current_superuser_user),
+):
+    """
+    Доля профилируемых запросов. Меняется только в текущем процессе
+    """
+    setting.profiler.sample_rate = sampling.sample_rate
+    logger.info("Profiler sample rate set to %s by %s", sampling.sample_rate, user.id)
+    return sampling
+
+
+@router.get(
+    "/loop-stalls",
+    response_model=list[LoopStallSchemas],
+    status_code=status.HTTP_200_OK,
+)
+async def get_list_loop_stalls(
+    user: User = Depends(current_superuser_user),
+):
+    """
+    Последние блокировки цикла событий в текущем процессе со стеком кода,
+    выполнявшегося во время блокировки
+    """
+    return list(reversed(loop_monitor.stalls))
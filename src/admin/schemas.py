@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ProfileSchemas(BaseModel):
+    id: UUID
+    method: str
+    path: str
+    started_at: datetime
+    duration: float
+    status: int
+    samples: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProfileTokenSchemas(BaseModel):
+    token: str
+    header: str
+
+
+class ProfileSamplingSchemas(BaseModel):
+    sample_rate: float = Field(ge=0, le=1)
+
+
+class LoopStallSchemas(BaseModel):
+    at: datetime
+    duration: Optional[float]
+    stack: str
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import RefreshToken
+from src.core.config import setting
+
+logger = logging.getLogger(__name__)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def create_refresh_token(
+    session: AsyncSession,
+    id_user: UUID,
+    expire_minutes: int = setting.auth_jwt.refresh_token_expire_minutes,
+) -> str:
+    """
+    Создание refresh-токена. В базе данных хранится только хеш токена.
+    Заодно удаляются истёкшие токены пользователя, чтобы таблица не росла
+    (без фиксации транзакции)
+    :param session: сессия
+    :type session: AsyncSession
+    :param id_user: id пользователя
+    :type id_user: UUID
+    :param expire_minutes: время экспирации токена
+    :type expire_minutes: int
+    :rtype: str
+    :return: refresh-токен
+    """
+    now: datetime = datetime.now(timezone.utc)
+    await session.execute(
+        delete(RefreshToken).where(
+            RefreshToken.user_id == id_user, RefreshToken.expires_at <= now
+        )
+    )
+
+    token: str = secrets.token_urlsafe(32)
+    stmt = insert(RefreshToken).values(
+        token_hash=hash_refresh_token(token),
+        user_id=id_user,
+        expires_at=now + timedelta(minutes=expire_minutes),
+    )
+    await session.execute(stmt)
+    return token
+
+
+async def rotate_refresh_token(
+    session: AsyncSession, token: str
+) -> Optional[tuple[UUID, str]]:
+    """
+    Замена refresh-токена на новый. Токен можно использовать только один раз
+    :param session: сессия
+    :type session: AsyncSession
+    :param token: refresh-токен
+    :type token: str
+    :rtype: Optional[tuple[UUID, str]]
+    :return: id пользователя и новый refresh-токен, None - если токен
+        не найден или истёк
+    """
+    stmt = (
+        delete(RefreshToken)
+        .where(
+            RefreshToken.token_hash == hash_refresh_token(token),
+            RefreshToken.expires_at > datetime.now(timezone.utc),
+        )
+        .returning(RefreshToken.user_id)
+    )
+    result: Result = await session.execute(stmt)
+    id_user: Optional[UUID] = result.scalar_one_or_none()
+    if id_user is None:
+        logger.info("Refresh token not found or expired")
+        return None
+
+    new_token: str = await create_refresh_token(session=session, id_user=id_user)
+    await session.commit()
+    return id_user, new_token
+
+
+async def revoke_refresh_token(session: AsyncSession, token: str) -> None:
+    """
+    :param session: сессия
+    :type session: AsyncSession
+    :param token: refresh-токен
+    :type token: str
+    :rtype: None
+    :return:
+    """
+    stmt = delete(RefreshToken).where(
+        RefreshToken.token_hash == hash_refresh_token(token)
+    )
+    await session.execute(stmt)
+    await session.commit()
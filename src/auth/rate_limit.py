@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from typing import Optional, Protocol
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.auth.models import RateLimitBucket
+from src.core.cache import TTLCache
+from src.core.config import setting, RateLimitSetting
+from src.core.database import engine
+from src.core.exceptions import TooManyRequests
+
+logger = logging.getLogger(__name__)
+
+
+# ключ корзины, емкость и скорость пополнения (токенов в секунду)
+Bucket = tuple[str, int, float]
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        pass
+
+    async def take_all(self, buckets: list[Bucket]) -> float:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+
+class MemoryBucketStore:
+    """
+    Token bucket в памяти процесса. Запись живет, пока корзина не наполнится
+    снова, поэтому отсутствие записи означает полную корзину
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(
+            max_size=max_keys, ttl=0
+        )
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """
+        :param key: ключ корзины
+        :type key: str
+        :param capacity: емкость корзины
+        :type capacity: int
+        :param rate: скорость пополнения, токенов в секунду
+        :type rate: float
+        :rtype: float
+        :return: 0 - если запрос разрешен, иначе время ожидания в секундах
+        """
+        return await self.take_all([(key, capacity, rate)])
+
+    async def take_all(self, buckets: list[Bucket]) -> float:
+        """
+        Списание токена из каждой корзины, только если все корзины разрешают
+        запрос. Отклоненный запрос не расходует токены
+        :param buckets: ключ, емкость и скорость пополнения каждой корзины
+        :type buckets: list[Bucket]
+        :rtype: float
+        :return: 0 - если запрос разрешен, иначе время ожидания в секундах
+        """
+        now: float = time.monotonic()
+        levels: list[float] = []
+        for key, capacity, rate in buckets:
+            bucket: Optional[tuple[float, float]] = self._buckets.get(key)
+            if bucket is None:
+                levels.append(capacity)
+            else:
+                tokens, updated = bucket
+                levels.append(min(capacity, tokens + (now - updated) * rate))
+
+        wait: float = max(
+            ((1 - tokens) / rate for tokens, (_, _, rate) in zip(levels, buckets)),
+            default=0,
+        )
+        if wait > 0:
+            return wait
+
+        for tokens, (key, capacity, rate) in zip(levels, buckets):
+            tokens -= 1
+            self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / rate)
+        return 0
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+
+class PostgresBucketStore:
+    """
+    Общее для всех процессов хранилище в Postgres. Используется алгоритм GCRA,
+    эквивалентный token bucket: в строке хранится только теоретическое время
+    прихода следующего запроса
+    """
+
+    def __init__(
+        self,
+        db_engine: AsyncEngine = engine,
+        purge_interval: float = setting.rate_limit.purge_interval,
+    ) -> None:
+        self.engine = db_engine
+        self.purge_interval = purge_interval
+        self._next_purge: float = 0
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        return await self.take_all([(key, capacity, rate)])
+
+    async def take_all(self, buckets: list[Bucket]) -> float:
+        """
+        Списание токена из каждой корзины, только если все корзины разрешают
+        запрос. Строки корзин блокируются в порядке ключей, проверка и
+        списание выполняются в одной транзакции
+        :param buckets: ключ, емкость и скорость пополнения каждой корзины
+        :type buckets: list[Bucket]
+        :rtype: float
+        :return: 0 - если запрос разрешен, иначе время ожидания в секундах
+        """
+        buckets = sorted(buckets)
+        keys: list[str] = [key for key, _, _ in buckets]
+        now = func.now()
+        async with self.engine.begin() as conn:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                # корзина с tat в прошлом полна и не отличается от отсутствующей:
+                # такие строки удаляются, иначе каждый новый email оставлял бы строку
+                await conn.execute(
+                    delete(RateLimitBucket).where(RateLimitBucket.tat <= now)
+                )
+            await conn.execute(
+                insert(RateLimitBucket)
+                .values([{"key": key, "tat": now} for key in keys])
+                .on_conflict_do_nothing(index_elements=[RateLimitBucket.key])
+            )
+            # отставание от текущего времени: сколько секунд уже "занято"
+            result = await conn.execute(
+                select(
+                    RateLimitBucket.key,
+                    func.extract(
+                        "epoch", func.greatest(RateLimitBucket.tat, now) - now
+                    ),
+                )
+                .where(RateLimitBucket.key.in_(keys))
+                .order_by(RateLimitBucket.key)
+                .with_for_update()
+            )
+            backlog: dict[str, float] = {key: float(value) for key, value in result}
+
+            # строку могла удалить очистка другого процесса: корзина полна
+            wait: float = max(
+                backlog.get(key, 0.0) + (1 - capacity) / rate
+                for key, capacity, rate in buckets
+            )
+            if wait > 0:
+                return wait
+
+            for key, _, rate in buckets:
+                stmt = insert(RateLimitBucket).values(
+                    key=key, tat=now + timedelta(seconds=1 / rate)
+                )
+                await conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[RateLimitBucket.key],
+                        set_={
+                            "tat": func.greatest(RateLimitBucket.tat, now)
+                            + timedelta(seconds=1 / rate)
+                        },
+                    )
+                )
+        return 0
+
+    async def clear(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(RateLimitBucket))
+
+
+class LoginRateLimiter:
+    """
+    Ограничение частоты попыток входа по email и по IP-адресу клиента.
+    Проверка выполняется до обращения к базе данных и до хеширования пароля
+    """
+
+    def __init__(
+        self, store: BucketStore, config: RateLimitSetting = setting.rate_limit
+    ) -> None:
+        self.store = store
+        self.config = config
+
+    async def check(self, email: str, ip: Optional[str]) -> None:
+        """
+        :param email: email пользователя
+        :type email: str
+        :param ip: IP-адрес клиента
+        :type ip: Optional[str]
+        :rtype: None
+        :return:
+        :raises TooManyRequests: если лимит попыток исчерпан
+        """
+        # email не ограничен по длине: в ключе хранится его хеш
+        email_digest: str = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        buckets: list[Bucket] = [
+            (
+                f"email:{email_digest}",
+                self.config.email_capacity,
+                self.config.email_per_minute / 60,
+            )
+        ]
+        if ip is not None:
+            buckets.append(
+                (f"ip:{ip}", self.config.ip_capacity, self.config.ip_per_minute / 60)
+            )
+        wait: float = await self.store.take_all(buckets)
+        if wait > 0:
+            logger.warning("Login rate limit exceeded for %s from %s", email, ip)
+            raise TooManyRequests(retry_after=wait)
+
+
+def create_bucket_store(config: RateLimitSetting = setting.rate_limit) -> BucketStore:
+    if config.backend == "postgres":
+        return PostgresBucketStore()
+    return MemoryBucketStore(max_keys=config.max_keys)
+
+
+login_limiter = LoginRateLimiter(store=create_bucket_store())
@@ -1,22 +1,31 @@
+import asyncio
 import logging
 from typing import Optional
 
+import aiohttp
 from fastapi import APIRouter, Request, Response, status, Depends
 from fastapi.exceptions import HTTPException
+from fastapi.responses import JSONResponse
 from starlette.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.users.models import User
 from src.core.config import (
     setting,
-    configure_logging,
     templates,
     oauth_yandex,
     COOKIE_NAME,
+    REFRESH_COOKIE_NAME,
 )
 from src.core.exceptions import ErrorInData, NotFindUser
 from src.core.jwt_utils import create_jwt, validate_password
 from src.core.database import get_async_session
-from src.auth.utils import get_yandex_user_data, get_access_token
+from src.auth.crud import (
+    create_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_token,
+)
+from src.auth.rate_limit import login_limiter
+from src.auth.utils import get_yandex_user_data, get_access_token, set_auth_cookies
 from src.auth.schemas import LoginSchemas
 from src.users.crud import (
     find_user_by_email,
@@ -29,7 +38,6 @@ from src.users.schemas import UserBaseSchemas
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +47,9 @@ async def user_login_by_password(
     data_login: LoginSchemas,
     session: AsyncSession = Depends(get_async_session),
 ):
+    await login_limiter.check(
+        email=data_login.email, ip=request.client and request.client.host
+    )
     try:
         user: User = await get_user_from_db(session=session, email=data_login.email)
     except NotFindUser:
@@ -54,19 +65,18 @@ async def user_login_by_password(
             user=str(user.id),
             expire_minutes=setting.auth_jwt.access_token_expire_minutes,
         )
-        refresh_token: str = await create_jwt(
-            user=str(user.id),
-            expire_minutes=setting.auth_jwt.refresh_token_expire_minutes,
+        refresh_token: str = await create_refresh_token(
+            session=session, id_user=user.id
         )
-
-        user.refresh_token = refresh_token
         await session.commit()
 
         resp = Response(
             content="The user is logged in",
             status_code=status.HTTP_202_ACCEPTED,
         )
-        resp.set_cookie(key=COOKIE_NAME, value=access_token, httponly=True)
+        set_auth_cookies(
+            response=resp, access_token=access_token, refresh_token=refresh_token
+        )
 
         request.session["user"] = {"family_name": user.full_name, "id": str(user.id)}
 
@@ -97,7 +107,27 @@ async def auth_yandex(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"{exp}",
         )
-    user_data = await get_yandex_user_data(token["access_token"])
+    try:
+        user_data = await get_yandex_user_data(token["access_token"])
+    except aiohttp.ClientResponseError as exp:
+        logger.warning("Yandex.ID user info request failed: %s", exp.status)
+        # отказ Яндекса в доступе по токену - ошибка авторизации,
+        # остальные ошибки - сбой внешнего сервиса
+        if 400 <= exp.status < 500:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Yandex.ID rejected the access token",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Yandex.ID is unavailable",
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exp:
+        logger.warning("Yandex.ID user info request failed: %r", exp)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Yandex.ID is unavailable",
+        )
 
     user_email = user_data.get("default_email")
     real_name = user_data.get("real_name")
@@ -115,24 +145,59 @@ async def auth_yandex(
     access_token: str = await create_jwt(
         user=str(user.id), expire_minutes=setting.auth_jwt.access_token_expire_minutes
     )
-    refresh_token: str = await create_jwt(
-        user=str(user.id), expire_minutes=setting.auth_jwt.refresh_token_expire_minutes
-    )
-
-    user.refresh_token = refresh_token
+    refresh_token: str = await create_refresh_token(session=session, id_user=user.id)
     await session.commit()
 
     resp: Response = RedirectResponse("welcome")
-    resp.set_cookie(key=COOKIE_NAME, value=access_token, httponly=True, samesite="lax")
+    set_auth_cookies(
+        response=resp, access_token=access_token, refresh_token=refresh_token
+    )
     request.session["user"] = {"family_name": user.full_name, "id": str(user.id)}
 
     return resp
 
 
+@router.post("/refresh")
+async def refresh_access_token(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+):
+    refresh_token: Optional[str] = request.cookies.get(REFRESH_COOKIE_NAME)
+    if refresh_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authorized"
+        )
+
+    rotated = await rotate_refresh_token(session=session, token=refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired. Please login again",
+        )
+    id_user, new_refresh_token = rotated
+
+    access_token: str = await create_jwt(
+        user=str(id_user), expire_minutes=setting.auth_jwt.access_token_expire_minutes
+    )
+    resp = JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
+    set_auth_cookies(
+        response=resp, access_token=access_token, refresh_token=new_refresh_token
+    )
+    return resp
+
+
 @router.get("/logout")
-def logout(request: Request):
+async def logout(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+):
+    refresh_token: Optional[str] = request.cookies.get(REFRESH_COOKIE_NAME)
+    if refresh_token is not None:
+        await revoke_refresh_token(session=session, token=refresh_token)
+
     resp: Response = RedirectResponse("/")
     resp.delete_cookie(COOKIE_NAME)
+    resp.delete_cookie(REFRESH_COOKIE_NAME, path="/auth")
     # request.session.pop("user")
     request.session.clear()
     return resp
@@ -1,27 +1,26 @@
 import logging
 
-import aiohttp
-from fastapi import Request
-
-from src.core.config import configure_logging, oauth_yandex
+from fastapi import Request, Response
+
+from src.core.config import (
+    oauth_yandex,
+    setting,
+    COOKIE_NAME,
+    REFRESH_COOKIE_NAME,
+)
 from authlib.integrations.starlette_client import OAuthError
 from src.core.exceptions import ExceptAuthentication
+from src.core.http_client import http_client
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 async def get_yandex_user_data(access_token):
     params = {"format": "json"}
     headers = {"Authorization": f"OAuth {access_token}"}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            "https://login.yandex.ru/info", params=params, headers=headers
-        ) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                response.raise_for_status()
+    return await http_client.get_json(
+        setting.http.yandex_info_url, params=params, headers=headers
+    )
 
 
 async def get_access_token(request: Request):
@@ -33,3 +32,29 @@ async def get_access_token(request: Request):
         raise ExceptAuthentication(detail=exp)
 
     return token
+
+
+def set_auth_cookies(response: Response, access_token: str, refresh_token: str) -> None:
+    """
+    Установка cookie с access- и refresh-токенами. Refresh-токен передается
+    только в запросах к /auth
+    :param response: ответ
+    :type response: Response
+    :param access_token: access-токен
+    :type access_token: str
+    :param refresh_token: refresh-токен
+    :type refresh_token: str
+    :rtype: None
+    :return:
+    """
+    response.set_cookie(
+        key=COOKIE_NAME, value=access_token, httponly=True, samesite="lax"
+    )
+    response.set_cookie(
+        key=REFRESH_COOKIE_NAME,
+        value=refresh_token,
+        max_age=setting.auth_jwt.refresh_token_expire_minutes * 60,
+        path="/auth",
+        httponly=True,
+        samesite="lax",
+    )
@@ -1,7 +1,7 @@
-import logging
 from pathlib import Path
+from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from fastapi.templating import Jinja2Templates
 from authlib.integrations.starlette_client import OAuth
@@ -9,6 +9,8 @@ from authlib.integrations.starlette_client import OAuth
 
 BASE_DIR = Path(__file__).parent.parent.parent
 UPLOAD_DIR = BASE_DIR / "upload"
+UPLOAD_SESSIONS_DIR = UPLOAD_DIR / ".sessions"
+BLOBS_DIR = UPLOAD_DIR / "blobs"
 
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
@@ -18,14 +20,7 @@ REDIRECT_URI = "http://localhost:8000/auth/yandex"
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 COOKIE_NAME = "bonds_audiofile"
-
-
-def configure_logging(level=logging.INFO):
-    logging.basicConfig(
-        level=level,
-        datefmt="%Y-%m-%d %H:%M:%S",
-        format="[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(levelname)-7s - %(message)s",
-    )
+REFRESH_COOKIE_NAME = "bonds_audiofile_refresh"
 
 
 class SettingConn(BaseSettings):
@@ -46,13 +41,26 @@ setting_conn = SettingConn()
 
 
 class DbSetting(BaseSettings):
-    url: str = (
-        f"postgresql+asyncpg://"
-        f"{setting_conn.postgres_user}:{setting_conn.postgres_password}"
-        f"@{setting_conn.postgres_host}:{setting_conn.postgres_port}"
-        f"/{setting_conn.postgres_db}"
+    # прежние имена переменных окружения (URL, ECHO) без префикса
+    # поддерживаются для совместимости
+    url: str = Field(
+        default=(
+            f"postgresql+asyncpg://"
+            f"{setting_conn.postgres_user}:{setting_conn.postgres_password}"
+            f"@{setting_conn.postgres_host}:{setting_conn.postgres_port}"
+            f"/{setting_conn.postgres_db}"
+        ),
+        validation_alias=AliasChoices("db_url", "url"),
     )
-    echo: bool = False
+    echo: bool = Field(default=False, validation_alias=AliasChoices("db_echo", "echo"))
+    replica_url: Optional[str] = None
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+
+    model_config = SettingsConfigDict(env_prefix="db_")
 
 
 class AuthJWT(BaseModel):
@@ -61,9 +69,116 @@ class AuthJWT(BaseModel):
     refresh_token_expire_minutes: int = 60 * 24 * 7
 
 
+class FileSetting(BaseSettings):
+    chunk_size: int = 1024 * 1024
+    batch_concurrency: int = 4
+    # сессии возобновляемой загрузки: наибольший объявленный размер файла,
+    # время жизни незавершённой сессии и период удаления просроченных сессий
+    max_upload_size: int = 10 * 1024 * 1024 * 1024
+    upload_session_ttl_hours: float = 24
+    upload_session_cleanup_interval: float = 60 * 60
+
+    model_config = SettingsConfigDict(env_prefix="files_")
+
+
+class HashSetting(BaseSettings):
+    workers: int = 2
+    max_pending: int = 32
+
+    model_config = SettingsConfigDict(env_prefix="hashing_")
+
+
+class CacheSetting(BaseSettings):
+    user_ttl: float = 30
+    user_max_size: int = 1024
+    token_max_size: int = 4096
+
+    model_config = SettingsConfigDict(env_prefix="cache_")
+
+
+class HttpSetting(BaseSettings):
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_ttl: int = 300
+    keepalive_timeout: float = 30
+    connect_timeout: float = 5
+    total_timeout: float = 10
+    retries: int = 3
+    backoff: float = 0.2
+    yandex_info_url: str = "https://login.yandex.ru/info"
+
+    model_config = SettingsConfigDict(env_prefix="http_")
+
+
+class RateLimitSetting(BaseSettings):
+    backend: Literal["memory", "postgres"] = "memory"
+    email_capacity: int = 5
+    email_per_minute: float = 5
+    ip_capacity: int = 30
+    ip_per_minute: float = 30
+    max_keys: int = 100_000
+    # период удаления из Postgres заполненных корзин, секунд
+    purge_interval: float = 60
+
+    model_config = SettingsConfigDict(env_prefix="rate_limit_")
+
+
+class ProxySetting(BaseSettings):
+    # адреса обратных прокси, которым доверяются заголовки X-Forwarded-For и
+    # X-Forwarded-Proto: через запятую, допускаются подсети и "*"
+    trusted_hosts: str = "127.0.0.1"
+
+    model_config = SettingsConfigDict(env_prefix="proxy_")
+
+
+class QueryLogSetting(BaseSettings):
+    slow_ms: float = 200
+    n_plus_one_threshold: int = 10
+
+    model_config = SettingsConfigDict(env_prefix="query_log_")
+
+
+class LogSetting(BaseSettings):
+    level: str = "INFO"
+    json_format: bool = True
+    info_sample_rate: float = 1.0
+    queue_size: int = 10_000
+
+    model_config = SettingsConfigDict(env_prefix="log_")
+
+
+class ProfilerSetting(BaseSettings):
+    sample_rate: float = 0.0
+    interval: float = 0.005
+    max_profiles: int = 50
+    token_expire_minutes: int = 5
+
+    model_config = SettingsConfigDict(env_prefix="profiler_")
+
+
+class LoopMonitorSetting(BaseSettings):
+    enabled: bool = True
+    interval: float = 0.1
+    threshold: float = 0.25
+    window: int = 600
+    max_stalls: int = 20
+
+    model_config = SettingsConfigDict(env_prefix="loop_monitor_")
+
+
 class Setting(BaseSettings):
     db: DbSetting = DbSetting()
     auth_jwt: AuthJWT = AuthJWT()
+    files: FileSetting = FileSetting()
+    hashing: HashSetting = HashSetting()
+    cache: CacheSetting = CacheSetting()
+    http: HttpSetting = HttpSetting()
+    rate_limit: RateLimitSetting = RateLimitSetting()
+    proxy: ProxySetting = ProxySetting()
+    query_log: QueryLogSetting = QueryLogSetting()
+    log: LogSetting = LogSetting()
+    profiler: ProfilerSetting = ProfilerSetting()
+    loop_monitor: LoopMonitorSetting = LoopMonitorSetting()
 
 
 setting = Setting()
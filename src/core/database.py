@@ -1,23 +1,78 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
 
 from src.core.config import setting
+from src.core.metrics import InstrumentedPool
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(
-    url=setting.db.url,
-    echo=setting.db.echo,
-)
+def create_engine_from_setting(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url=url,
+        echo=setting.db.echo,
+        poolclass=InstrumentedPool,
+        pool_size=setting.db.pool_size,
+        max_overflow=setting.db.max_overflow,
+        pool_timeout=setting.db.pool_timeout,
+        pool_recycle=setting.db.pool_recycle,
+        pool_pre_ping=setting.db.pool_pre_ping,
+    )
+
+
+engine = create_engine_from_setting(setting.db.url)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engine: Optional[AsyncEngine] = (
+    create_engine_from_setting(setting.db.replica_url)
+    if setting.db.replica_url
+    else None
+)
+replica_session_maker: Optional[async_sessionmaker[AsyncSession]] = (
+    async_sessionmaker(replica_engine, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    Завершение текущей транзакции сессии перед длительным вводом-выводом:
+    соединение возвращается в пул и снова берётся из него только при
+    следующем запросе к базе данных
+    """
+    if session.in_transaction():
+        await session.commit()
+
+
+async def get_async_session_read(
+    session: AsyncSession = Depends(get_async_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для запросов только на чтение: реплика, если она настроена,
+    иначе основная сессия запроса
+    """
+    if replica_session_maker is None:
+        yield session
+        return
+    async with replica_session_maker() as replica_session:
+        yield replica_session
+
+
+def get_read_engine() -> AsyncEngine:
+    """
+    Движок для запросов только на чтение, выполняемых вне сессии запроса:
+    реплика, если она настроена, иначе основная база данных
+    """
+    return replica_engine if replica_engine is not None else engine
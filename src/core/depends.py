@@ -2,16 +2,16 @@ from typing import Annotated, Optional
 from uuid import UUID
 
 import jwt
-from fastapi import Depends, status, Path, Request, Response
+from fastapi import Depends, status, Path, Request
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_async_session
-from src.core.config import COOKIE_NAME, setting
-from src.core.jwt_utils import decode_jwt, create_jwt
-from src.users.crud import get_user_by_id
+from src.core.config import COOKIE_NAME
+from src.core.jwt_utils import decode_jwt_cached
+from src.users.crud import get_user_by_id, get_user_by_id_cached
 from src.users.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -19,54 +19,28 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 async def current_user_authorization_cookie(
     request: Request,
-    response: Response,
     session: AsyncSession = Depends(get_async_session),
 ) -> User:
-    cookie_token = request.cookies.get(COOKIE_NAME)
-
-    if cookie_token is None:
+    """
+    Пользователь, выполняющий запрос. Определяется один раз за запрос и
+    сохраняется в request.state.user, остальные зависимости используют его
+    """
+    user: Optional[User] = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+    user = await _authorize_by_cookie(request=request, session=session)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authorized"
         )
-
-    try:
-        payload = await decode_jwt(cookie_token)
-    except jwt.ExpiredSignatureError:
-        # получаем пользователя по ID из сессии
-        id_user: UUID = UUID(request.session["user"].get("id"))
-        user: User = await get_user_by_id(session=session, id_user=id_user)
-
-        # проверяем наличие refresh_token
-        if user.refresh_token is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authorized"
-            )
-        # извлекаем данные из refresh_token
-        try:
-            payload = await decode_jwt(user.refresh_token)
-        except jwt.ExpiredSignatureError:
-            # в случае экспирации токена авторизируемся заново
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Session expired. Please login again",
-            )
-        else:
-            access_token: str = await create_jwt(
-                user=str(user.id),
-                expire_minutes=setting.auth_jwt.access_token_expire_minutes,
-            )
-            response.set_cookie(key=COOKIE_NAME, value=access_token, httponly=True)
-            return user
-
-    else:
-        id_user = UUID(payload["sub"])
-    return await get_user_by_id(session=session, id_user=id_user)
+    request.state.user = user
+    return user
 
 
-async def current_superuser_user(
+async def _authorize_by_cookie(
     request: Request,
-    session: AsyncSession = Depends(get_async_session),
-) -> User:
+    session: AsyncSession,
+) -> Optional[User]:
     cookie_token = request.cookies.get(COOKIE_NAME)
 
     if cookie_token is None:
@@ -75,15 +49,19 @@ async def current_superuser_user(
         )
 
     try:
-        payload = await decode_jwt(cookie_token)
+        payload = await decode_jwt_cached(cookie_token)
     except jwt.ExpiredSignatureError:
+        # новый access-токен выдается через POST /auth/refresh
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
         )
-
     id_user = UUID(payload["sub"])
-    user: User = await get_user_by_id(session=session, id_user=id_user)
+    return await get_user_by_id_cached(session=session, id_user=id_user)
 
+
+async def current_superuser_user(
+    user: User = Depends(current_user_authorization_cookie),
+) -> User:
     if not user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -97,16 +75,17 @@ async def user_by_id(
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_user_authorization_cookie),
 ) -> User:
+    if user.id == id_user:
+        return user
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough rights",
+        )
     find_user: Optional[User] = await get_user_by_id(session=session, id_user=id_user)
     if find_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {id_user} not found!",
         )
-    if user.id == id_user or user.is_superuser:
-        return find_user
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough rights",
-        )
+    return find_user
@@ -33,3 +33,17 @@ class EmailInUse(Exception):
 
 class UniqueViolationError(Exception):
     pass
+
+
+class NotFindFile(Exception):
+    pass
+
+
+class ServerBusy(Exception):
+    pass
+
+
+class TooManyRequests(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Too many requests, retry after {retry_after:.1f} s")
+        self.retry_after = retry_after
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from src.core.config import setting
+from src.core.exceptions import ServerBusy
+from src.core.metrics import (
+    EXECUTOR_ACTIVE,
+    EXECUTOR_PENDING,
+    EXECUTOR_REJECTED,
+    EXECUTOR_TASKS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ExecutorStats:
+    name: str
+    workers: int
+    max_pending: int
+    pending: int
+    active: int
+    queued: int
+    completed: int
+    failed: int
+    rejected: int
+
+
+class BoundedExecutor:
+    """
+    Пул потоков для тяжёлых синхронных вычислений с ограничением числа
+    ожидающих задач. При переполнении новые задачи отклоняются (ServerBusy),
+    а не накапливаются в очереди
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int) -> None:
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=name
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            EXECUTOR_REJECTED.labels(executor=self.name).inc()
+            logger.warning(
+                "Executor %s is overloaded: %d tasks pending", self.name, self.pending
+            )
+            raise ServerBusy(f"Executor {self.name} is overloaded")
+
+        self._set_pending(self.pending + 1)
+        try:
+            loop = asyncio.get_running_loop()
+            result: Any = await loop.run_in_executor(self._executor, func, *args)
+        except Exception:
+            self.failed += 1
+            EXECUTOR_TASKS.labels(executor=self.name, result="error").inc()
+            raise
+        else:
+            self.completed += 1
+            EXECUTOR_TASKS.labels(executor=self.name, result="ok").inc()
+            return result
+        finally:
+            self._set_pending(self.pending - 1)
+
+    def _set_pending(self, pending: int) -> None:
+        # свободный поток сразу забирает задачу из очереди, поэтому
+        # выполняется не больше workers задач, остальные ожидают
+        self.pending = pending
+        EXECUTOR_PENDING.labels(executor=self.name).set(pending)
+        EXECUTOR_ACTIVE.labels(executor=self.name).set(min(pending, self.workers))
+
+    def stats(self) -> ExecutorStats:
+        return ExecutorStats(
+            name=self.name,
+            workers=self.workers,
+            max_pending=self.max_pending,
+            pending=self.pending,
+            active=min(self.pending, self.workers),
+            queued=max(self.pending - self.workers, 0),
+            completed=self.completed,
+            failed=self.failed,
+            rejected=self.rejected,
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_executor = BoundedExecutor(
+    name="bcrypt",
+    workers=setting.hashing.workers,
+    max_pending=setting.hashing.max_pending,
+)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+import aiohttp
+
+from src.core.config import setting, HttpSetting
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpClient:
+    """
+    HTTP-клиент на время жизни приложения: пул keep-alive соединений,
+    кеш DNS, таймауты и повтор запросов с экспоненциальной задержкой
+    """
+
+    def __init__(self, config: HttpSetting = setting.http) -> None:
+        self.config = config
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def start(self) -> None:
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.config.limit,
+            limit_per_host=self.config.limit_per_host,
+            ttl_dns_cache=self.config.dns_ttl,
+            keepalive_timeout=self.config.keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=self.config.total_timeout, connect=self.config.connect_timeout
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def stop(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self.start()
+        assert self._session is not None
+        return self._session
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[dict[str, str]] = None,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Any:
+        """
+        GET-запрос с разбором JSON-ответа. Ошибки соединения, таймауты и
+        ответы 429/5xx повторяются, остальные ошибки возвращаются сразу
+        :param url: адрес
+        :type url: str
+        :param params: параметры запроса
+        :type params: Optional[dict[str, str]]
+        :param headers: заголовки запроса
+        :type headers: Optional[dict[str, str]]
+        :rtype: Any
+        :return: тело ответа
+        """
+        attempt: int = 0
+        while True:
+            try:
+                async with self.session.get(
+                    url, params=params, headers=headers
+                ) as response:
+                    if (
+                        response.status not in RETRY_STATUSES
+                        or attempt >= self.config.retries
+                    ):
+                        response.raise_for_status()
+                        return await response.json()
+                    logger.warning(
+                        "Request to %s failed with status %s", url, response.status
+                    )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exp:
+                if attempt >= self.config.retries:
+                    raise
+                logger.warning("Request to %s failed: %r", url, exp)
+            await asyncio.sleep(self.config.backoff * 2**attempt)
+            attempt += 1
+
+
+http_client = HttpClient()
@@ -1,16 +1,27 @@
 from datetime import datetime, timedelta, timezone
 import asyncio
+import hashlib
+import time
 from typing import Optional
 
 import bcrypt
 import jwt
 
+from src.core.cache import TTLCache
 from src.core.config import setting, setting_conn
+from src.core.executor import password_executor
+
+# кеш проверенных токенов: ключ - хеш ключа проверки и хеш токена,
+# значение - содержание токена
+token_cache: TTLCache[str, dict] = TTLCache(
+    max_size=setting.cache.token_max_size,
+    ttl=setting.auth_jwt.access_token_expire_minutes * 60,
+)
 
 
 async def create_hash_password(password: str) -> bytes:
     """
-    Создание хеш пароля
+    Создание хеш пароля. Хеширование выполняется в отдельном пуле потоков
     :param password: пароль
     :type password: str
     :rtype: bytes
@@ -18,8 +29,7 @@ async def create_hash_password(password: str) -> bytes:
     """
     salt = bcrypt.gensalt()
     pwd_bytes: bytes = password.encode()
-    await asyncio.sleep(0)
-    return bcrypt.hashpw(pwd_bytes, salt)
+    return await password_executor.run(bcrypt.hashpw, pwd_bytes, salt)
 
 
 async def validate_password(
@@ -28,6 +38,7 @@ async def validate_password(
 ) -> bool:
     """
     Проверка валидности пароля. Проверяет пароль с хеш-значением правильного пароля
+    в отдельном пуле потоков
     :param password: переданный пароль
     :type password: str
     :param hashed_password: хеш-значение правильного пароля
@@ -35,10 +46,8 @@ async def validate_password(
     :rtype: bool
     :return: возвращает True, если пароль верный иначе - False
     """
-    await asyncio.sleep(0)
-    return bcrypt.checkpw(
-        password=password.encode(),
-        hashed_password=hashed_password,
+    return await password_executor.run(
+        bcrypt.checkpw, password.encode(), hashed_password
     )
 
 
@@ -85,6 +94,44 @@ async def decode_jwt(
     return decoded
 
 
+async def decode_jwt_cached(
+    token: str | bytes,
+    key: str = setting_conn.SECRET_KEY,
+    algorithm: str = setting.auth_jwt.algorithm,
+) -> dict:
+    """
+    Раскодирует jwt-токен, используя кеш проверенных токенов. Запись кеша
+    живёт не дольше срока действия токена и действительна только для ключа
+    и алгоритма, которыми токен был проверен
+    :param token: jwt-токен
+    :type token: str | bytes
+    :param key: секретный ключ шифрования
+    :type key: str
+    :param algorithm: алгоритм шифрования
+    :type algorithm: str
+    :rtype: dict
+    :return: содержание токена (payload)
+    """
+    key_id: str = hashlib.sha256(f"{algorithm}:{key}".encode()).hexdigest()
+    if isinstance(token, str):
+        token = token.encode()
+    digest: str = f"{key_id}:{hashlib.sha256(token).hexdigest()}"
+
+    payload: Optional[dict] = token_cache.get(digest)
+    if payload is not None:
+        if "exp" in payload and payload["exp"] <= time.time():
+            token_cache.pop(digest)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return dict(payload)
+
+    payload = await decode_jwt(token, key=key, algorithm=algorithm)
+    ttl: Optional[float] = None
+    if "exp" in payload:
+        ttl = min(payload["exp"] - time.time(), token_cache.ttl)
+    token_cache.set(digest, dict(payload), ttl=ttl)
+    return payload
+
+
 async def create_jwt(
     user: str,
     expire_minutes: Optional[int] = None,
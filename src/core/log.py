@@ -0,0 +1,180 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from uuid import uuid4
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import setting, LogSetting
+
+TEXT_FORMAT = (
+    "[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(levelname)-7s - "
+    "[%(request_id)s] %(message)s"
+)
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Запись лога в одну строку JSON
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Добавляет в запись id текущего HTTP-запроса. Выполняется в потоке,
+    создавшем запись, до передачи её в очередь
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборка записей уровня INFO и ниже. Решение принимается по id запроса,
+    поэтому записи одного запроса сохраняются или отбрасываются вместе.
+    Предупреждения и ошибки сохраняются всегда
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+        self._credit = 0.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1:
+            return True
+        request_id: Optional[str] = getattr(record, "request_id", None)
+        if request_id is not None:
+            return zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+        # вне запроса сохраняется каждая 1/rate запись
+        self._credit += self.rate
+        if self._credit >= 1 - 1e-9:
+            self._credit -= 1
+            return True
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    При переполнении очереди запись отбрасывается, а не блокирует цикл событий
+    """
+
+    dropped: int = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config: LogSetting = setting.log) -> QueueListener:
+    """
+    Настройка логирования приложения. Вызывается один раз при запуске:
+    записи передаются через очередь в отдельный поток, который пишет их
+    в stderr, так что запись логов не блокирует цикл событий
+    :param config: настройки логирования
+    :type config: LogSetting
+    :rtype: QueueListener
+    :return: поток, записывающий логи
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if config.json_format:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter(TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
+        )
+
+    log_queue: queue.Queue = queue.Queue(maxsize=config.queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(config.info_sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """
+    Остановка потока записи логов с записью оставшихся в очереди сообщений
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: id запроса берется из заголовка X-Request-ID или
+    создается, сохраняется в контексте для логов и возвращается в ответе
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id: str = (
+            headers.get(REQUEST_ID_HEADER.lower().encode(), b"").decode("latin-1")[:64]
+            or uuid4().hex
+        )
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(REQUEST_ID_HEADER, request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Optional
+
+from src.core.config import setting, LoopMonitorSetting
+from src.core.metrics import (
+    EVENT_LOOP_BLOCKED,
+    EVENT_LOOP_LAG,
+    EVENT_LOOP_LAG_QUANTILE,
+)
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+@dataclass(slots=True)
+class LoopStall:
+    """
+    Блокировка цикла событий: стек кода, выполнявшегося во время блокировки
+    """
+
+    stack: str
+    at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    duration: Optional[float] = None
+
+
+class LoopMonitor:
+    """
+    Сторож цикла событий. Задача в цикле засыпает на interval и измеряет
+    задержку пробуждения. Отдельный поток следит за пропущенными
+    пробуждениями и, пока цикл еще заблокирован, сохраняет стек потока цикла
+    """
+
+    def __init__(self, config: LoopMonitorSetting = setting.loop_monitor) -> None:
+        self.config = config
+        self.lags: deque[float] = deque(maxlen=config.window)
+        self.stalls: deque[LoopStall] = deque(maxlen=config.max_stalls)
+        self._heartbeat: float = time.monotonic()
+        self._reported: Optional[float] = None
+        self._paused: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[LoopStall] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if not self.config.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        assert self._watchdog is not None
+        await asyncio.to_thread(self._watchdog.join)
+        self._task = None
+        self._watchdog = None
+
+    def quantiles(self) -> dict[float, float]:
+        if not self.lags:
+            return {q: 0.0 for q in QUANTILES}
+        ordered: list[float] = sorted(self.lags)
+        return {
+            q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES
+        }
+
+    async def _tick(self) -> None:
+        while True:
+            start: float = time.monotonic()
+            self._heartbeat = start
+            await asyncio.sleep(self.config.interval)
+            if self._paused != start:
+                self._record(max(0.0, time.monotonic() - start - self.config.interval))
+
+    def _record(self, lag: float) -> None:
+        EVENT_LOOP_LAG.observe(lag)
+        self.lags.append(lag)
+        for q, value in self.quantiles().items():
+            EVENT_LOOP_LAG_QUANTILE.labels(quantile=str(q)).set(value)
+        stall: Optional[LoopStall] = self._pending
+        if stall is not None:
+            stall.duration = lag
+            self._pending = None
+            logger.warning("Event loop was blocked for %.3f s", lag)
+
+    def _watch(self) -> None:
+        period: float = min(self.config.interval, self.config.threshold) / 2
+        loop: Optional[asyncio.AbstractEventLoop] = self._loop
+        assert loop is not None
+        while not self._stopped.wait(period):
+            heartbeat: float = self._heartbeat
+            if not loop.is_running():
+                # остановленный цикл (например, между run_until_complete)
+                # не заблокирован: пауза не считается ни задержкой, ни блокировкой
+                self._paused = heartbeat
+                continue
+            late: float = time.monotonic() - heartbeat - self.config.interval
+            if late < self.config.threshold or heartbeat in (
+                self._reported,
+                self._paused,
+            ):
+                continue
+            self._reported = heartbeat
+            self._capture(late)
+
+    def _capture(self, late: float) -> None:
+        if self._loop_thread_id is None:
+            return
+        frame: Optional[FrameType] = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack: str = "".join(traceback.format_stack(frame))
+        stall = LoopStall(stack=stack)
+        self.stalls.append(stall)
+        self._pending = stall
+        EVENT_LOOP_BLOCKED.inc()
+        logger.warning(
+            "Event loop blocked for more than %.3f s, running:\n%s", late, stack
+        )
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,186 @@
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.query_stats import RequestQueries, current_request_queries
+
+SIZE_BUCKETS = tuple(256 * 4**i for i in range(12))
+THROUGHPUT_BUCKETS = tuple(64 * 1024 * 4**i for i in range(8))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+)
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+UPLOAD_THROUGHPUT = Histogram(
+    "http_upload_bytes_per_second",
+    "Request body receive rate",
+    ["method", "route"],
+    buckets=THROUGHPUT_BUCKETS,
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_QUERIES = Counter("db_queries_total", "Executed SQL statements", ["route"])
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between the scheduled and actual wake-up of the loop monitor",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+# в режиме нескольких воркеров берется худший из работающих процессов
+EVENT_LOOP_LAG_QUANTILE = Gauge(
+    "event_loop_lag_quantile_seconds",
+    "Event loop lag percentiles over the recent window",
+    ["quantile"],
+    multiprocess_mode="livemax",
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total", "Event loop stalls longer than the threshold"
+)
+
+EXECUTOR_PENDING = Gauge(
+    "executor_pending_tasks",
+    "Tasks submitted to a bounded executor and not yet finished",
+    ["executor"],
+    multiprocess_mode="livesum",
+)
+EXECUTOR_ACTIVE = Gauge(
+    "executor_active_tasks",
+    "Tasks running in bounded executor threads",
+    ["executor"],
+    multiprocess_mode="livesum",
+)
+EXECUTOR_TASKS = Counter(
+    "executor_tasks_total",
+    "Finished bounded executor tasks by result",
+    ["executor", "result"],
+)
+EXECUTOR_REJECTED = Counter(
+    "executor_rejected_total",
+    "Tasks rejected because the bounded executor queue is full",
+    ["executor"],
+)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время ожидания свободного соединения
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start: float = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: задержка, размеры запроса и ответа, скорость приема тела
+    запроса и количество SQL-запросов по каждому маршруту. Количество запросов
+    берется из QueryStatsMiddleware, которая должна быть внешней
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start: float = time.perf_counter()
+        received: list[int] = [0]
+        sent: list[int] = [0]
+        status: list[int] = [500]
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                received[0] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                sent[0] += len(message.get("body", b""))
+            elif message["type"] == "http.response.zerocopysend":
+                sent[0] += message.get("count") or 0
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed: float = time.perf_counter() - start
+            method: str = scope["method"]
+            route: str = _route_of(scope)
+            REQUEST_LATENCY.labels(method, route, str(status[0])).observe(elapsed)
+            REQUEST_SIZE.labels(method, route).observe(received[0])
+            RESPONSE_SIZE.labels(method, route).observe(sent[0])
+            if received[0] > 0 and elapsed > 0:
+                UPLOAD_THROUGHPUT.labels(method, route).observe(received[0] / elapsed)
+            queries: Optional[RequestQueries] = current_request_queries()
+            if queries is not None:
+                DB_QUERIES.labels(route=route).inc(queries.count)
+                DB_QUERIES_PER_REQUEST.labels(method, route).observe(queries.count)
+
+
+def _route_of(scope: Scope) -> str:
+    # шаблон пути, а не сам путь, чтобы не плодить метки
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def render_metrics(multiproc_dir: Optional[str] = None) -> tuple[bytes, str]:
+    """
+    Метрики в текстовом формате Prometheus. При запуске под gunicorn
+    (задана переменная PROMETHEUS_MULTIPROC_DIR) значения всех воркеров
+    суммируются
+    :param multiproc_dir: каталог с файлами метрик воркеров
+    :type multiproc_dir: Optional[str]
+    :rtype: tuple[bytes, str]
+    :return: тело ответа и его тип
+    """
+    multiproc_dir = multiproc_dir or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
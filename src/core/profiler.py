@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import FrameType
+from typing import Optional
+from uuid import UUID, uuid4
+
+import jwt
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import setting, setting_conn, ProfilerSetting
+from src.core.jwt_utils import decode_jwt, encode_jwt
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile-Token"
+# отдельный ключ: токен профилирования нельзя использовать как access-токен
+PROFILE_TOKEN_KEY = f"{setting_conn.SECRET_KEY}:profiler"
+
+
+@dataclass(slots=True)
+class RequestProfile:
+    """
+    Статистический профиль одного запроса: стеки в свернутом (folded)
+    формате и количество попавших в них выборок
+    """
+
+    method: str
+    path: str
+    interval: float
+    id: UUID = field(default_factory=uuid4)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    duration: float = 0
+    status: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def folded(self) -> str:
+        """
+        Формат flamegraph.pl / inferno / speedscope: "кадр;кадр;кадр количество"
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _awaited_stack(task: asyncio.Task[None]) -> list[str]:
+    # цепочка корутин, которых ожидает приостановленная задача
+    names: list[str] = []
+    coro: Optional[object] = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            names.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    names.append("[awaiting]")
+    return names
+
+
+class _Sampler(threading.Thread):
+    """
+    Поток, периодически снимающий стек задачи профилируемого запроса. Если
+    задача выполняется, берется стек потока цикла событий, если ожидает -
+    цепочка ожидаемых корутин (например, запрос к БД или пул bcrypt)
+    """
+
+    def __init__(self, profile: RequestProfile, task: asyncio.Task) -> None:
+        super().__init__(name="request-profiler", daemon=True)
+        self.profile = profile
+        self.task = task
+        self.loop_thread_id: int = threading.get_ident()
+        # код _run общий для всех профилируемых запросов, поэтому задача
+        # запроса определяется по своему кадру, а не по объекту кода
+        self.root_frame: Optional[FrameType] = getattr(
+            task.get_coro(), "cr_frame", None
+        )
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.profile.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        frame: Optional[FrameType] = sys._current_frames().get(self.loop_thread_id)
+        names: list[str] = []
+        while frame is not None:
+            names.append(_frame_name(frame))
+            if frame is self.root_frame:
+                self.profile.stacks[";".join(reversed(names))] += 1
+                return
+            frame = frame.f_back
+        if not self.task.done():
+            self.profile.stacks[";".join(_awaited_stack(self.task))] += 1
+
+
+class ProfileStore:
+    """
+    Последние профили запросов в памяти процесса
+    """
+
+    def __init__(self, max_profiles: int) -> None:
+        self._profiles: deque[RequestProfile] = deque(maxlen=max_profiles)
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: UUID) -> Optional[RequestProfile]:
+        return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self) -> list[RequestProfile]:
+        return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+profile_store = ProfileStore(max_profiles=setting.profiler.max_profiles)
+
+
+async def create_profile_token(
+    id_user: UUID,
+    expire_minutes: int = setting.profiler.token_expire_minutes,
+) -> str:
+    """
+    Подписанный токен для заголовка X-Profile-Token
+    :param id_user: id администратора
+    :type id_user: UUID
+    :param expire_minutes: время экспирации токена
+    :type expire_minutes: int
+    :rtype: str
+    :return: токен
+    """
+    payload = {
+        "sub": str(id_user),
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=expire_minutes),
+    }
+    return await encode_jwt(payload, key=PROFILE_TOKEN_KEY)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware: профилирование доли запросов (PROFILER_SAMPLE_RATE) или
+    отдельного запроса с подписанным заголовком X-Profile-Token
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: ProfilerSetting = setting.profiler,
+        store: ProfileStore = profile_store,
+    ) -> None:
+        self.app = app
+        self.config = config
+        self.store = store
+
+    async def _requested(self, scope: Scope) -> bool:
+        token: Optional[str] = Headers(scope=scope).get(PROFILE_HEADER)
+        if token is None:
+            return random.random() < self.config.sample_rate
+        try:
+            await decode_jwt(token, key=PROFILE_TOKEN_KEY)
+        except jwt.InvalidTokenError:
+            logger.warning("Invalid profile token for %s", scope["path"])
+            return False
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            method=scope["method"], path=scope["path"], interval=self.config.interval
+        )
+        # отдельная задача, чтобы отличать стек запроса от остального кода
+        task: asyncio.Task = asyncio.create_task(
+            self._run(profile, scope, receive, send)
+        )
+        sampler = _Sampler(profile=profile, task=task)
+        start: float = time.perf_counter()
+        sampler.start()
+        try:
+            await task
+        finally:
+            sampler.stopped.set()
+            await asyncio.to_thread(sampler.join)
+            profile.duration = time.perf_counter() - start
+            self.store.add(profile)
+            logger.info(
+                "Request %s %s profiled: %d samples in %.3f s",
+                profile.method,
+                profile.path,
+                profile.samples,
+                profile.duration,
+            )
+
+    async def _run(
+        self, profile: RequestProfile, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
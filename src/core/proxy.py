@@ -0,0 +1,26 @@
+from typing import cast
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+from uvicorn._types import ASGI3Application, ASGIReceiveCallable, ASGISendCallable
+from uvicorn._types import Scope as UvicornScope
+from uvicorn.middleware import proxy_headers
+
+
+class ProxyHeadersMiddleware:
+    """
+    ASGI middleware: адрес и схема клиента берутся из заголовков
+    X-Forwarded-For и X-Forwarded-Proto, если запрос пришел от доверенного
+    прокси. Обертка над middleware uvicorn с типами ASGI из starlette
+    """
+
+    def __init__(self, app: ASGIApp, trusted_hosts: list[str] | str) -> None:
+        self.app = proxy_headers.ProxyHeadersMiddleware(
+            cast(ASGI3Application, app), trusted_hosts=trusted_hosts
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(
+            cast(UvicornScope, scope),
+            cast(ASGIReceiveCallable, receive),
+            cast(ASGISendCallable, send),
+        )
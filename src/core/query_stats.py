@@ -0,0 +1,156 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import setting, QueryLogSetting
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class RequestQueries:
+    """
+    SQL-запросы, выполненные в рамках одного HTTP-запроса
+    """
+
+    scope: Scope
+    count: int = 0
+    duration: float = 0
+    shapes: Counter = field(default_factory=Counter)
+
+
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def current_request_queries() -> Optional[RequestQueries]:
+    return _request_queries.get()
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """
+    Значения параметров заменяются их типами, чтобы в лог не попадали
+    пароли, токены и персональные данные
+    """
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(p) for p in parameters]
+    return type(parameters).__name__
+
+
+def _request_name(scope: Scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+class QueryInstrumentation:
+    """
+    Обработчики событий движка: учет запросов текущего HTTP-запроса, лог
+    медленных запросов и предупреждение о повторяющихся запросах (N+1)
+    """
+
+    def __init__(self, config: QueryLogSetting = setting.query_log) -> None:
+        self.config = config
+
+    def before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        elapsed: float = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        if elapsed * 1000 >= self.config.slow_ms:
+            logger.warning(
+                "Slow query %.1f ms: %s; parameters: %s",
+                elapsed * 1000,
+                statement,
+                redact_parameters(parameters),
+            )
+
+        queries: Optional[RequestQueries] = _request_queries.get()
+        if queries is None:
+            return
+        queries.count += 1
+        queries.duration += elapsed
+        shape: str = " ".join(statement.split())
+        queries.shapes[shape] += 1
+        if queries.shapes[shape] == self.config.n_plus_one_threshold + 1:
+            logger.warning(
+                "Possible N+1 in %s: statement executed more than %s times: %s",
+                _request_name(queries.scope),
+                self.config.n_plus_one_threshold,
+                shape,
+            )
+
+
+query_instrumentation = QueryInstrumentation()
+
+
+def instrument_engine(
+    engine: AsyncEngine, instrumentation: QueryInstrumentation = query_instrumentation
+) -> None:
+    sync_engine = engine.sync_engine
+    for name in ("before_cursor_execute", "after_cursor_execute"):
+        handler = getattr(instrumentation, name)
+        if not event.contains(sync_engine, name, handler):
+            event.listen(sync_engine, name, handler)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: связывает SQL-запросы с HTTP-запросом и добавляет
+    в ответ заголовок Server-Timing с количеством запросов и временем в БД
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start: float = time.perf_counter()
+        queries = RequestQueries(scope=scope)
+        token = _request_queries.set(queries)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries", '
+                    f"app;dur={(time.perf_counter() - start) * 1000:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
@@ -1,10 +1,15 @@
 from datetime import datetime
+import uuid
 from uuid import uuid4
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 from sqlalchemy import (
+    BigInteger,
     DateTime,
+    String,
     func,
+    Index,
+    JSON,
     UUID,
     ForeignKey,
     UniqueConstraint,
@@ -17,10 +22,25 @@ if TYPE_CHECKING:
     from src.users.models import User
 
 
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=datetime.utcnow,
+    )
+
+
 class File(Base):
     __tablename__ = "files"
     __table_args__ = (
         UniqueConstraint("filename", "user_id", name="idx_unique_filename_user"),
+        Index("idx_files_user_id_registered_at", "user_id", "registered_at", "id"),
+        Index("idx_files_user_id_filename", "user_id", "filename", "id"),
     )
 
     id: Mapped[UUID] = mapped_column(
@@ -37,5 +57,28 @@ class File(Base):
         default=datetime.utcnow,
     )
     user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    blob_sha256: Mapped[Optional[str]] = mapped_column(ForeignKey("blobs.sha256"))
 
     user: Mapped["User"] = relationship(back_populates="files")
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+    filename: Mapped[str]
+    size: Mapped[int] = mapped_column(BigInteger)
+    ranges: Mapped[list] = mapped_column(JSON, default=list)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=datetime.utcnow,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE")
+    )
@@ -0,0 +1,90 @@
+import asyncio
+from email.utils import parsedate_to_datetime
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class MediaFileResponse(FileResponse):
+    """
+    Отдача файла с поддержкой Range, условных запросов (If-None-Match,
+    If-Modified-Since) и расширения ASGI http.response.zerocopysend, при
+    наличии которого сервер передаёт данные через os.sendfile
+    """
+
+    zerocopy: bool = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        if self.stat_result is not None and self.is_not_modified(Headers(scope=scope)):
+            response = Response(
+                status_code=304,
+                headers={
+                    "etag": self.headers["etag"],
+                    "last-modified": self.headers["last-modified"],
+                },
+            )
+            return await response(scope, receive, send)
+        await super().__call__(scope, receive, send)
+
+    def is_not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etag: str = self.headers["etag"]
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or etag in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                modified = parsedate_to_datetime(self.headers["last-modified"])
+            except (TypeError, ValueError):
+                return False
+            return modified <= since
+        return False
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if not self.zerocopy or send_header_only:
+            return await super()._handle_simple(send, send_header_only)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        await self._send_zerocopy(send, 0, None)
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if not self.zerocopy or send_header_only:
+            return await super()._handle_single_range(
+                send, start, end, file_size, send_header_only
+            )
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await send(
+            {"type": "http.response.start", "status": 206, "headers": self.raw_headers}
+        )
+        await self._send_zerocopy(send, start, end - start)
+
+    async def _send_zerocopy(self, send: Send, offset: int, count: int | None) -> None:
+        # открытие и закрытие файла выполняются вне цикла событий
+        file = await asyncio.to_thread(open, self.path, mode="rb")
+        try:
+            message = {
+                "type": ZEROCOPY_EXTENSION,
+                "file": file,
+                "offset": offset,
+                "more_body": False,
+            }
+            if count is not None:
+                message["count"] = count
+            await send(message)
+        finally:
+            await asyncio.to_thread(file.close)
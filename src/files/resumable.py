@@ -0,0 +1,410 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
+
+import aiofiles
+from sqlalchemy import select
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import UPLOAD_SESSIONS_DIR, setting
+from src.core.database import async_session_maker, release_connection
+from src.core.exceptions import ErrorInData, NotFindFile
+from src.files.models import File, UploadSession
+from src.files.schemas import UploadSessionCreateSchemas, UploadSessionSchemas
+from src.files.utils import (
+    add_file_record,
+    check_file_name,
+    get_blob_tmp_path,
+    get_media_extension,
+    hash_blob_file,
+)
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+def get_session_path(upload_id: UUID) -> Path:
+    """
+    Путь к файлу с принятыми данными сессии загрузки
+    :param upload_id: id сессии загрузки
+    :type upload_id: UUID
+    :rtype: Path
+    :return: путь к файлу
+    """
+    return UPLOAD_SESSIONS_DIR / f"{upload_id}.part"
+
+
+def merge_ranges(ranges: list[list[int]], start: int, end: int) -> list[list[int]]:
+    """
+    Добавление принятого диапазона байт [start, end) к списку диапазонов
+    :param ranges: отсортированный список непересекающихся диапазонов
+    :type ranges: list[list[int]]
+    :param start: начало диапазона
+    :type start: int
+    :param end: конец диапазона (не включая)
+    :type end: int
+    :rtype: list[list[int]]
+    :return: новый отсортированный список диапазонов
+    """
+    result: list[list[int]] = []
+    for range_start, range_end in sorted([*ranges, [start, end]]):
+        if result and range_start <= result[-1][1]:
+            result[-1][1] = max(result[-1][1], range_end)
+        else:
+            result.append([range_start, range_end])
+    return result
+
+
+def get_committed_offset(ranges: list[list[int]]) -> int:
+    """
+    Размер непрерывно принятых данных от начала файла
+    :param ranges: отсортированный список непересекающихся диапазонов
+    :type ranges: list[list[int]]
+    :rtype: int
+    :return: смещение, с которого нужно продолжить загрузку
+    """
+    if ranges and ranges[0][0] == 0:
+        return ranges[0][1]
+    return 0
+
+
+def upload_session_info(upload: UploadSession) -> UploadSessionSchemas:
+    return UploadSessionSchemas(
+        id=upload.id,
+        filename=upload.filename,
+        size=upload.size,
+        offset=get_committed_offset(upload.ranges),
+        ranges=upload.ranges,
+    )
+
+
+def _allocate_session_file(upload_id: UUID, size: int) -> None:
+    """
+    Создание файла сессии загрузки заданного размера
+    (вызывается вне цикла событий)
+    :param upload_id: id сессии загрузки
+    :type upload_id: UUID
+    :param size: размер файла в байтах
+    :type size: int
+    """
+    UPLOAD_SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    path: Path = get_session_path(upload_id)
+    try:
+        with open(path, mode="wb") as f:
+            f.truncate(size)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+
+async def create_upload_session(
+    session: AsyncSession,
+    user: User,
+    data: UploadSessionCreateSchemas,
+) -> UploadSession:
+    """
+    Создание сессии возобновляемой загрузки файла
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файла
+    :type user: User
+    :param data: имя и размер загружаемого файла
+    :type data: UploadSessionCreateSchemas
+    :rtype: UploadSession
+    :return: сессия загрузки
+    """
+    logger.info("Create upload session for file %s", data.filename)
+    if Path(data.filename).name != data.filename:
+        raise ErrorInData("invalid file name")
+    get_media_extension(data.filename)
+    if data.size > setting.files.max_upload_size:
+        raise ErrorInData(
+            f"File size exceeds the limit of {setting.files.max_upload_size} bytes"
+        )
+
+    # файл сессии создаётся до записи в базу: строка сессии без файла
+    # не появляется ни при ошибке выделения места, ни при ошибке фиксации
+    upload_id: UUID = uuid4()
+    try:
+        await asyncio.to_thread(_allocate_session_file, upload_id, data.size)
+    except OSError as exc:
+        logger.warning("Cannot allocate upload session file: %s", exc)
+        raise ErrorInData(f"Cannot allocate {data.size} bytes for the file")
+
+    upload: UploadSession = UploadSession(
+        id=upload_id,
+        filename=data.filename,
+        size=data.size,
+        ranges=[],
+        user_id=user.id,
+    )
+    session.add(upload)
+    try:
+        await session.commit()
+    except BaseException:
+        await asyncio.to_thread(get_session_path(upload_id).unlink, missing_ok=True)
+        raise
+    return upload
+
+
+async def get_upload_session(
+    session: AsyncSession,
+    user_id: UUID,
+    upload_id: UUID,
+    for_update: bool = False,
+) -> UploadSession:
+    """
+    :param session: сессия
+    :type session: AsyncSession
+    :param user_id: id владельца файла
+    :type user_id: UUID
+    :param upload_id: id сессии загрузки
+    :type upload_id: UUID
+    :param for_update: заблокировать строку до конца транзакции
+    :type for_update: bool
+    :rtype: UploadSession
+    :return: сессия загрузки
+    """
+    stmt = select(UploadSession).filter(
+        UploadSession.id == upload_id, UploadSession.user_id == user_id
+    )
+    if for_update:
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
+    result: Result = await session.execute(stmt)
+    upload = result.scalar_one_or_none()
+    if upload is None:
+        raise NotFindFile(f"Upload session {upload_id} not found")
+    return upload
+
+
+async def write_upload_chunk(
+    session: AsyncSession,
+    user: User,
+    upload_id: UUID,
+    offset: int,
+    stream: AsyncIterator[bytes],
+) -> UploadSession:
+    """
+    Запись блока данных сессии загрузки начиная с указанного смещения
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файла
+    :type user: User
+    :param upload_id: id сессии загрузки
+    :type upload_id: UUID
+    :param offset: смещение блока от начала файла
+    :type offset: int
+    :param stream: поток данных тела запроса
+    :type stream: AsyncIterator[bytes]
+    :rtype: UploadSession
+    :return: сессия загрузки
+    """
+    upload: UploadSession = await get_upload_session(
+        session=session, user_id=user.id, upload_id=upload_id
+    )
+    # завершаем транзакцию, чтобы не держать её открытой во время приёма данных
+    await release_connection(session)
+    if offset < 0 or offset > upload.size:
+        raise ErrorInData("Offset is outside the file")
+
+    end: int = offset
+    try:
+        async with aiofiles.open(get_session_path(upload.id), mode="r+b") as f:
+            await f.seek(offset)
+            async for chunk in stream:
+                if end + len(chunk) > upload.size:
+                    raise ErrorInData("Chunk exceeds the declared file size")
+                await f.write(chunk)
+                end += len(chunk)
+    except FileNotFoundError:
+        # файл сессии уже забран завершением загрузки или удалён как просроченный
+        raise NotFindFile(f"Upload session {upload_id} is completed or expired")
+
+    upload = await get_upload_session(
+        session=session, user_id=user.id, upload_id=upload_id, for_update=True
+    )
+    if end > offset:
+        upload.ranges = merge_ranges(upload.ranges, offset, end)
+    await session.commit()
+    logger.info("Upload session %s received bytes %d-%d", upload_id, offset, end)
+    return upload
+
+
+def _restore_session_file(claimed_path: Path, session_path: Path) -> None:
+    """
+    Возврат забранного для завершения файла сессии на место
+    (вызывается вне цикла событий)
+    """
+    if claimed_path.exists():
+        os.rename(claimed_path, session_path)
+
+
+async def complete_upload_session(
+    session: AsyncSession,
+    user: User,
+    upload_id: UUID,
+) -> File:
+    """
+    Завершение сессии загрузки и регистрация файла пользователя
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файла
+    :type user: User
+    :param upload_id: id сессии загрузки
+    :type upload_id: UUID
+    :rtype: File
+    :return: запись о файле
+    """
+    upload: UploadSession = await get_upload_session(
+        session=session, user_id=user.id, upload_id=upload_id, for_update=True
+    )
+    if get_committed_offset(upload.ranges) != upload.size:
+        raise ErrorInData("The file has not been fully uploaded")
+
+    await check_file_name(session=session, user_id=user.id, filename=upload.filename)
+
+    # под блокировкой строки файл сессии только переименовывается: повторное
+    # завершение той же сессии не найдёт файл, а хеширование идёт без
+    # блокировки и без занятого соединения
+    session_path: Path = get_session_path(upload.id)
+    claimed_path: Path = await asyncio.to_thread(get_blob_tmp_path)
+    try:
+        await asyncio.to_thread(os.rename, session_path, claimed_path)
+    except FileNotFoundError:
+        raise NotFindFile(f"Upload session {upload_id} is already being completed")
+    await release_connection(session)
+
+    try:
+        sha256, size = await hash_blob_file(claimed_path)
+        upload = await get_upload_session(
+            session=session, user_id=user.id, upload_id=upload_id, for_update=True
+        )
+    except NotFindFile:
+        # сессию удалили (отменой или как просроченную), пока файл хешировался:
+        # ссылок на её файл больше нет
+        await asyncio.to_thread(claimed_path.unlink, missing_ok=True)
+        raise
+    except BaseException:
+        await asyncio.to_thread(_restore_session_file, claimed_path, session_path)
+        raise
+
+    try:
+        await session.delete(upload)
+        file_user: File = await add_file_record(
+            session=session,
+            user=user,
+            filename=upload.filename,
+            sha256=sha256,
+            size=size,
+            tmp_path=claimed_path,
+            discard_on_error=False,
+        )
+    except BaseException:
+        # сессия загрузки остаётся в базе, возвращаем на место её файл
+        await asyncio.to_thread(_restore_session_file, claimed_path, session_path)
+        raise
+    logger.info("Upload session %s completed", upload_id)
+    return file_user
+
+
+async def delete_upload_session(
+    session: AsyncSession,
+    user: User,
+    upload_id: UUID,
+) -> None:
+    """
+    Отмена сессии загрузки
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файла
+    :type user: User
+    :param upload_id: id сессии загрузки
+    :type upload_id: UUID
+    :rtype: None
+    :return:
+    """
+    upload: UploadSession = await get_upload_session(
+        session=session, user_id=user.id, upload_id=upload_id
+    )
+    await session.delete(upload)
+    await session.commit()
+    await asyncio.to_thread(get_session_path(upload.id).unlink, missing_ok=True)
+    logger.info("Upload session %s deleted", upload_id)
+
+
+async def delete_expired_upload_sessions(
+    session: AsyncSession,
+    expired_before: datetime,
+) -> int:
+    """
+    Удаление незавершённых сессий загрузки, созданных раньше указанного
+    времени, вместе с их файлами
+    :param session: сессия
+    :type session: AsyncSession
+    :param expired_before: время, раньше которого сессия считается просроченной
+    :type expired_before: datetime
+    :rtype: int
+    :return: количество удалённых сессий
+    """
+    # заблокированные строки пропускаются: их сейчас завершают или удаляют
+    stmt = (
+        select(UploadSession)
+        .filter(UploadSession.created_at < expired_before)
+        .with_for_update(skip_locked=True)
+    )
+    result: Result = await session.execute(stmt)
+    uploads: list[UploadSession] = list(result.scalars().all())
+    for upload in uploads:
+        await session.delete(upload)
+    await session.commit()
+
+    for upload in uploads:
+        await asyncio.to_thread(get_session_path(upload.id).unlink, missing_ok=True)
+    if uploads:
+        logger.info("Deleted %d expired upload sessions", len(uploads))
+    return len(uploads)
+
+
+class UploadSessionCleaner:
+    """
+    Фоновая задача, периодически удаляющая просроченные сессии загрузки
+    """
+
+    def __init__(
+        self,
+        ttl_hours: float = setting.files.upload_session_ttl_hours,
+        interval: float = setting.files.upload_session_cleanup_interval,
+    ) -> None:
+        self.ttl = timedelta(hours=ttl_hours)
+        self.interval = interval
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    await delete_expired_upload_sessions(
+                        session=session,
+                        expired_before=datetime.now(timezone.utc) - self.ttl,
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error deleting expired upload sessions")
+            await asyncio.sleep(self.interval)
@@ -1,19 +1,55 @@
+import asyncio
 import logging
+import os
+from typing import Optional
+from uuid import UUID
 
-from fastapi import APIRouter, UploadFile, HTTPException, status, Depends
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    HTTPException,
+    status,
+    Depends,
+    Form,
+    Query,
+    Request,
+    Response,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.files.schemas import FileLoadSchemas, FilesListSchemas
-from src.files.utils import load_media_file, list_files
-from src.core.config import configure_logging
-from src.core.exceptions import ErrorInData, UniqueViolationError
+from src.files.schemas import (
+    FileLoadResultSchemas,
+    FileLoadSchemas,
+    FilesListSchemas,
+    FilesSortBy,
+    SortOrder,
+    UploadSessionCreateSchemas,
+    UploadSessionSchemas,
+)
+from src.files.resumable import (
+    create_upload_session,
+    get_upload_session,
+    write_upload_chunk,
+    complete_upload_session,
+    delete_upload_session,
+    upload_session_info,
+)
+from src.files.responses import MediaFileResponse
+from src.files.utils import (
+    load_media_file,
+    load_media_files,
+    load_media_stream,
+    list_files,
+    get_file_by_id,
+    get_file_path,
+)
+from src.core.exceptions import ErrorInData, NotFindFile, UniqueViolationError
 from src.users.models import User
 from src.core.depends import current_user_authorization_cookie
-from src.core.database import get_async_session
+from src.core.database import get_async_session, get_async_session_read
 
 router = APIRouter(prefix="/files", tags=["files"])
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -51,13 +87,224 @@ async def load_file(
     return {"response": "OK"}
 
 
+@router.post(
+    "/load-batch",
+    response_model=list[FileLoadResultSchemas],
+    status_code=status.HTTP_200_OK,
+)
+async def load_files_batch(
+    upload_files: list[UploadFile],
+    new_names_files: list[str] = Form(),
+    user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if len(upload_files) != len(new_names_files):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The number of files and file names does not match",
+        )
+    files_load = [
+        FileLoadSchemas(
+            file=upload_file.file,
+            filename=upload_file.filename,
+            new_filename=new_name_file,
+        )
+        for upload_file, new_name_file in zip(upload_files, new_names_files)
+    ]
+    return await load_media_files(session=session, user=user, loadfiles=files_load)
+
+
 @router.get(
     "/list",
     response_model=list[FilesListSchemas],
     status_code=status.HTTP_200_OK,
 )
 async def get_list_files(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    sort_by: FilesSortBy = "registered_at",
+    order: SortOrder = "asc",
+    session: AsyncSession = Depends(get_async_session_read),
+    user: User = Depends(current_user_authorization_cookie),
+):
+    try:
+        files, next_cursor = await list_files(
+            session=session,
+            user_id=user.id,
+            limit=limit,
+            cursor=cursor,
+            sort_by=sort_by,
+            order=order,
+        )
+    except ErrorInData as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exp}",
+        )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return files
+
+
+@router.get("/{file_id}/download", response_class=MediaFileResponse)
+async def download_file(
+    file_id: UUID,
+    user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        file_user = await get_file_by_id(
+            session=session, user_id=user.id, file_id=file_id
+        )
+        path_file = get_file_path(file_user)
+        stat_result = await asyncio.to_thread(os.stat, path_file)
+    except (NotFindFile, FileNotFoundError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File with id {file_id} not found",
+        )
+    return MediaFileResponse(
+        path_file,
+        filename=file_user.filename,
+        stat_result=stat_result,
+        content_disposition_type="inline",
+    )
+
+
+@router.post(
+    "/uploads",
+    response_model=UploadSessionSchemas,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_upload(
+    data: UploadSessionCreateSchemas,
+    user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        upload = await create_upload_session(session=session, user=user, data=data)
+    except ErrorInData as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exp}",
+        )
+    return upload_session_info(upload)
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=UploadSessionSchemas,
+    status_code=status.HTTP_200_OK,
+)
+async def get_upload(
+    upload_id: UUID,
+    user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        upload = await get_upload_session(
+            session=session, user_id=user.id, upload_id=upload_id
+        )
+    except NotFindFile as exp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{exp}",
+        )
+    return upload_session_info(upload)
+
+
+@router.put(
+    "/uploads/{upload_id}",
+    response_model=UploadSessionSchemas,
+    status_code=status.HTTP_200_OK,
+)
+async def put_upload_chunk(
+    upload_id: UUID,
+    offset: int,
+    request: Request,
+    user: User = Depends(current_user_authorization_cookie),
     session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        upload = await write_upload_chunk(
+            session=session,
+            user=user,
+            upload_id=upload_id,
+            offset=offset,
+            stream=request.stream(),
+        )
+    except NotFindFile as exp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{exp}",
+        )
+    except ErrorInData as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exp}",
+        )
+    return upload_session_info(upload)
+
+
+@router.post("/uploads/{upload_id}/complete", status_code=status.HTTP_201_CREATED)
+async def complete_upload(
+    upload_id: UUID,
     user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    return await list_files(session=session, user_id=user.id)
+    try:
+        await complete_upload_session(session=session, user=user, upload_id=upload_id)
+    except NotFindFile as exp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{exp}",
+        )
+    except (ErrorInData, UniqueViolationError) as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exp}",
+        )
+    return {"response": "OK"}
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_upload(
+    upload_id: UUID,
+    user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    try:
+        await delete_upload_session(session=session, user=user, upload_id=upload_id)
+    except NotFindFile as exp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{exp}",
+        )
+
+
+@router.put("/{name}", status_code=status.HTTP_201_CREATED)
+async def load_file_raw(
+    name: str,
+    request: Request,
+    user: User = Depends(current_user_authorization_cookie),
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        await load_media_stream(
+            session=session,
+            user=user,
+            filename=name,
+            stream=request.stream(),
+        )
+    except ErrorInData as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exp}",
+        )
+    except UniqueViolationError as exp:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exp}",
+        )
+    return {"response": "OK"}
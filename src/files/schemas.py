@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import BinaryIO
+from typing import BinaryIO, Literal, Optional
 from uuid import uuid4
 
-from pydantic import BaseModel, ConfigDict, Field, UUID4
+from pydantic import BaseModel, ConfigDict, Field, UUID4, NonNegativeInt
 
 
 @dataclass(slots=True)
@@ -12,9 +12,32 @@ class FileLoadSchemas:
     new_filename: str
 
 
+class FileLoadResultSchemas(BaseModel):
+    filename: str
+    status: Literal["OK", "error"] = "error"
+    detail: Optional[str] = None
+
+
+FilesSortBy = Literal["registered_at", "filename"]
+SortOrder = Literal["asc", "desc"]
+
+
 class FilesListSchemas(BaseModel):
     id: UUID4 = Field(default_factory=uuid4)
     filename: str
     path_file: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UploadSessionCreateSchemas(BaseModel):
+    filename: str
+    size: NonNegativeInt
+
+
+class UploadSessionSchemas(BaseModel):
+    id: UUID4
+    filename: str
+    size: int
+    offset: int
+    ranges: list[list[int]]
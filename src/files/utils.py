@@ -1,79 +1,858 @@
+import asyncio
+import base64
+import errno
+import hashlib
+import json
 import logging
+import os
+import shutil
+from collections import Counter
+from datetime import datetime
 from pathlib import Path
-from uuid import UUID
+from typing import Any, AsyncIterator, BinaryIO, Optional
+from uuid import UUID, uuid4
 
 import aiofiles
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer,
+    String,
+    column,
+    delete,
+    func,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.engine import Result
+from sqlalchemy.engine import Result, Row
 from sqlalchemy.exc import IntegrityError
 
-from src.files.schemas import FileLoadSchemas
-from src.core.config import UPLOAD_DIR
-from src.core.config import configure_logging
-from src.core.exceptions import ErrorInData, UniqueViolationError
+from src.files.schemas import (
+    FileLoadResultSchemas,
+    FileLoadSchemas,
+    FilesSortBy,
+    SortOrder,
+)
+from src.core.config import BASE_DIR, BLOBS_DIR, setting
+from src.core.database import release_connection
+from src.core.exceptions import ErrorInData, NotFindFile, UniqueViolationError
 from src.users.models import User
-from src.files.models import File
+from src.files.models import Blob, File
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
+# первый ключ рекомендательных блокировок содержимого в хранилище
+BLOB_LOCK_NAMESPACE = 6
 
-async def load_media_file(
-    session: AsyncSession,
-    user: User,
-    loadfile: FileLoadSchemas,
-):
-    logger.info("Start write file by name %s", loadfile.new_filename)
-    point = loadfile.filename.rfind(".")
-    if point and loadfile.filename[point + 1 :].lower() in (
-        "mp3",
-        "aac",
-        "wav",
-        "flac",
-        "alac",
+
+async def write_file_by_chunks(
+    source: BinaryIO,
+    path_file: Path,
+    chunk_size: int = setting.files.chunk_size,
+    digest: Optional["hashlib._Hash"] = None,
+) -> int:
+    """
+    Потоковая запись файла на диск блоками фиксированного размера
+    :param source: исходный файл
+    :type source: BinaryIO
+    :param path_file: путь к записываемому файлу
+    :type path_file: Path
+    :param chunk_size: размер блока в байтах
+    :type chunk_size: int
+    :param digest: хеш, обновляемый записываемыми блоками
+    :type digest: Optional[hashlib._Hash]
+    :rtype: int
+    :return: количество записанных байт
+    """
+    size: int = 0
+    # файл, сброшенный на диск, читается в потоке, чтобы не блокировать цикл событий
+    on_disk: bool = _is_on_disk(source)
+    async with aiofiles.open(path_file, mode="wb") as f:
+        while True:
+            if on_disk:
+                chunk = await asyncio.to_thread(source.read, chunk_size)
+            else:
+                chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            if digest is not None:
+                digest.update(chunk)
+            await f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def _is_on_disk(source: BinaryIO) -> bool:
+    """
+    Проверка, что файл хранится на диске и имеет файловый дескриптор
+    (SpooledTemporaryFile до сброса на диск хранится в памяти)
+    """
+    if not getattr(source, "_rolled", True):
+        return False
+    try:
+        source.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    copied: int = 0
+    while copied < count:
+        sent: int = os.copy_file_range(
+            src_fd, dst_fd, count - copied, offset + copied, copied
+        )
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    copied: int = 0
+    while copied < count:
+        sent: int = os.sendfile(dst_fd, src_fd, offset + copied, count - copied)
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+
+def _transfer_disk_file(source: BinaryIO, path_file: Path) -> str:
+    name = getattr(source, "name", None)
+    if (
+        isinstance(name, str)
+        and os.path.isfile(name)
+        and os.stat(name).st_dev == os.stat(path_file.parent).st_dev
     ):
-        user_email: str = user.email.lower()
-        nic_name: str = user_email.replace(
-            ".",
-            "_",
+        os.rename(name, path_file)
+        return "rename"
+
+    source.flush()
+    src_fd: int = source.fileno()
+    offset: int = source.tell()
+    count: int = os.fstat(src_fd).st_size - offset
+
+    with open(path_file, mode="wb") as dst:
+        dst_fd: int = dst.fileno()
+        strategy: str = "copy"
+        for kernel_strategy, copy_func in (
+            ("copy_file_range", _copy_file_range),
+            ("sendfile", _sendfile),
+        ):
+            if not hasattr(os, kernel_strategy):
+                continue
+            try:
+                copied: int = copy_func(src_fd, dst_fd, offset, count)
+            except OSError as exp:
+                if exp.errno not in (
+                    errno.EXDEV,
+                    errno.ENOSYS,
+                    errno.EINVAL,
+                    errno.EOPNOTSUPP,
+                ):
+                    raise
+            else:
+                if copied == count:
+                    strategy = kernel_strategy
+                    break
+                # 0 до конца данных: ядро скопировало не всё, пробуем
+                # следующий способ, а не оставляем усечённый файл
+                logger.warning(
+                    "%s copied %d of %d bytes", kernel_strategy, copied, count
+                )
+            dst.seek(0)
+            dst.truncate()
+        else:
+            source.seek(offset)
+            shutil.copyfileobj(source, dst, setting.files.chunk_size)
+            dst.flush()
+
+        size: int = os.fstat(dst_fd).st_size
+    if size != count:
+        raise OSError(errno.EIO, f"Copied {size} of {count} bytes", str(path_file))
+    return strategy
+
+
+def _promote_disk_file(
+    source: BinaryIO,
+    path_file: Path,
+    digest: Optional["hashlib._Hash"] = None,
+) -> str:
+    """
+    Перемещение файла с диска в место постоянного хранения без копирования
+    данных через память процесса. Хеш, если он нужен, вычисляется после
+    переноса за один проход чтения
+    :param source: исходный файл
+    :type source: BinaryIO
+    :param path_file: путь к записываемому файлу
+    :type path_file: Path
+    :param digest: хеш, обновляемый содержимым файла
+    :type digest: Optional[hashlib._Hash]
+    :rtype: str
+    :return: использованный способ копирования
+    """
+    strategy: str = _transfer_disk_file(source, path_file)
+    if digest is not None:
+        with open(path_file, mode="rb") as f:
+            _update_digest(f, digest, setting.files.chunk_size)
+    return strategy
+
+
+async def promote_file(
+    source: BinaryIO,
+    path_file: Path,
+    chunk_size: int = setting.files.chunk_size,
+    digest: Optional["hashlib._Hash"] = None,
+) -> str:
+    """
+    Сохранение загруженного файла в место постоянного хранения. Файлы на диске
+    переносятся через os.rename или копируются средствами ядра
+    (os.copy_file_range / os.sendfile) вне цикла событий, файлы в памяти
+    записываются блоками
+    :param source: исходный файл
+    :type source: BinaryIO
+    :param path_file: путь к записываемому файлу
+    :type path_file: Path
+    :param chunk_size: размер блока в байтах
+    :type chunk_size: int
+    :param digest: хеш, вычисляемый по содержимому во время записи
+    :type digest: Optional[hashlib._Hash]
+    :rtype: str
+    :return: использованный способ копирования
+    """
+    if not _is_on_disk(source):
+        await write_file_by_chunks(
+            source=source, path_file=path_file, chunk_size=chunk_size, digest=digest
+        )
+        return "chunks"
+    return await asyncio.to_thread(_promote_disk_file, source, path_file, digest)
+
+
+MEDIA_EXTENSIONS: tuple[str, ...] = (
+    "mp3",
+    "aac",
+    "wav",
+    "flac",
+    "alac",
+)
+
+
+def get_media_extension(filename: str) -> str:
+    """
+    Проверка формата файла по его расширению
+    :param filename: имя файла
+    :type filename: str
+    :rtype: str
+    :return: расширение файла вместе с точкой
+    """
+    point = filename.rfind(".")
+    if point > 0 and filename[point + 1 :].lower() in MEDIA_EXTENSIONS:
+        return filename[point:]
+    logger.error("invalid format file")
+    raise ErrorInData("invalid format file")
+
+
+def get_blob_path(sha256: str) -> Path:
+    """
+    Путь к файлу с содержимым в хранилище, разбитом на каталоги по хешу
+    :param sha256: хеш SHA-256 содержимого файла
+    :type sha256: str
+    :rtype: Path
+    :return: путь к файлу
+    """
+    return BLOBS_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def _update_digest(source: BinaryIO, digest: "hashlib._Hash", chunk_size: int) -> int:
+    size: int = 0
+    while chunk := source.read(chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    return size
+
+
+def _place_blob(path_file: Path, sha256: str) -> bool:
+    """
+    Размещение временного файла в хранилище по хешу жёсткой ссылкой: файл
+    появляется под своим путём атомарно и целиком, а временный файл остаётся
+    на месте до фиксации транзакции
+    :return: True, если содержимое сохранено впервые
+    """
+    blob_path: Path = get_blob_path(sha256)
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(path_file, blob_path)
+    except FileExistsError:
+        return False
+    return True
+
+
+def _place_blobs(items: list[tuple[Path, str]]) -> None:
+    for path_file, sha256 in items:
+        _place_blob(path_file, sha256)
+
+
+def _discard_files(paths: list[Path]) -> None:
+    for path_file in paths:
+        path_file.unlink(missing_ok=True)
+
+
+async def lock_blobs(session: AsyncSession, sha256s: list[str]) -> None:
+    """
+    Блокировка содержимого по хешам до конца транзакции. Загрузка и удаление
+    неиспользуемого содержимого с одинаковым хешем выполняются по очереди,
+    поэтому файл не удаляется после того, как на него сослалась новая запись
+    :param session: сессия
+    :type session: AsyncSession
+    :param sha256s: хеши SHA-256 содержимого
+    :type sha256s: list[str]
+    :rtype: None
+    :return:
+    """
+    # порядок захвата одинаков во всех транзакциях, чтобы не было взаимоблокировок
+    for sha256 in sorted(set(sha256s)):
+        await session.execute(
+            select(
+                func.pg_advisory_xact_lock(BLOB_LOCK_NAMESPACE, func.hashtext(sha256))
+            )
         )
-        nic_name: str = nic_name.replace(
-            "@",
-            "_",
+
+
+def get_blob_tmp_path() -> Path:
+    tmp_dir: Path = BLOBS_DIR / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir / uuid4().hex
+
+
+async def stage_blob(
+    source: BinaryIO,
+    chunk_size: int = setting.files.chunk_size,
+) -> tuple[str, int, Path]:
+    """
+    Запись загруженного файла во временный файл хранилища с вычислением хеша
+    содержимого во время записи. В хранилище по хешу файл размещает
+    add_file_records перед фиксацией записей о файлах
+    :param source: исходный файл
+    :type source: BinaryIO
+    :param chunk_size: размер блока в байтах
+    :type chunk_size: int
+    :rtype: tuple[str, int, Path]
+    :return: хеш SHA-256, размер содержимого и путь к временному файлу
+    """
+    tmp_path: Path = await asyncio.to_thread(get_blob_tmp_path)
+    digest = hashlib.sha256()
+    try:
+        strategy: str = await promote_file(
+            source=source, path_file=tmp_path, chunk_size=chunk_size, digest=digest
         )
+    except BaseException:
+        await asyncio.to_thread(_discard_files, [tmp_path])
+        raise
+    size: int = await asyncio.to_thread(os.path.getsize, tmp_path)
+    sha256: str = digest.hexdigest()
+    logger.info("Blob %s staged using %s", sha256, strategy)
+    return sha256, size, tmp_path
+
+
+async def hash_blob_file(
+    path_file: Path,
+    chunk_size: int = setting.files.chunk_size,
+) -> tuple[str, int]:
+    """
+    Вычисление хеша файла с диска вне цикла событий
+    :param path_file: путь к файлу
+    :type path_file: Path
+    :param chunk_size: размер блока в байтах
+    :type chunk_size: int
+    :rtype: tuple[str, int]
+    :return: хеш SHA-256 и размер содержимого
+    """
+
+    def _hash() -> tuple[str, int]:
+        digest = hashlib.sha256()
+        with open(path_file, mode="rb") as f:
+            size: int = _update_digest(f, digest, chunk_size)
+        return digest.hexdigest(), size
+
+    return await asyncio.to_thread(_hash)
 
-        filename: str = loadfile.new_filename + loadfile.filename[point:]
 
-        folder_path: Path = Path(UPLOAD_DIR / nic_name)
-        folder_path.mkdir(parents=True, exist_ok=True)
-        dir_file_full: str = str(folder_path)
-        dir_file: str = dir_file_full[dir_file_full.find("upload") :]
+async def check_file_name(session: AsyncSession, user_id: UUID, filename: str) -> None:
+    """
+    Проверка, что у пользователя нет файла с таким именем
+    :param session: сессия
+    :type session: AsyncSession
+    :param user_id: id владельца файла
+    :type user_id: UUID
+    :param filename: имя файла
+    :type filename: str
+    :rtype: None
+    :return:
+    """
+    stmt = select(File.id).filter(File.user_id == user_id, File.filename == filename)
+    result: Result = await session.execute(stmt)
+    if result.first() is not None:
+        raise UniqueViolationError("Duplicate name files")
+
+
+async def add_file_records(
+    session: AsyncSession,
+    user: User,
+    items: list[tuple[str, str, int, Path]],
+    discard_on_error: bool = True,
+) -> list[File]:
+    """
+    Регистрация файлов пользователя в базе данных одной транзакцией и
+    увеличение счётчиков ссылок на их содержимое. Содержимое размещается
+    в хранилище до фиксации транзакции, поэтому зафиксированная запись всегда
+    ссылается на существующий файл. Файл, оставшийся после отката, не мешает:
+    его повторно использует следующая загрузка того же содержимого.
+    Временные файлы удаляются после фиксации, а при ошибке - если задано
+    discard_on_error
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файлов
+    :type user: User
+    :param items: имя файла, хеш SHA-256, размер содержимого и путь
+        к временному файлу для каждого файла
+    :type items: list[tuple[str, str, int, Path]]
+    :param discard_on_error: удалять временные файлы при ошибке
+    :type discard_on_error: bool
+    :rtype: list[File]
+    :return: записи о файлах
+    """
+    blobs: dict[str, dict] = {}
+    for _, sha256, size, _ in items:
+        blob = blobs.setdefault(
+            sha256, {"sha256": sha256, "size": size, "ref_count": 0}
+        )
+        blob["ref_count"] += 1
 
-        file_user: File = File(
+    stmt = insert(Blob).values(list(blobs.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Blob.sha256],
+        set_={"ref_count": Blob.ref_count + stmt.excluded.ref_count},
+    )
+    files_user: list[File] = [
+        File(
             filename=filename,
-            path_file=dir_file,
+            path_file=str(get_blob_path(sha256).relative_to(BASE_DIR)),
+            blob_sha256=sha256,
             user=user,
         )
-        try:
-            session.add(file_user)
-            await session.commit()
-        except IntegrityError:
+        for filename, sha256, _, _ in items
+    ]
+    tmp_paths: list[Path] = [tmp_path for *_, tmp_path in items]
+    try:
+        await lock_blobs(session=session, sha256s=list(blobs))
+        await session.execute(stmt)
+        session.add_all(files_user)
+        await session.flush()
+        await asyncio.to_thread(
+            _place_blobs, [(tmp_path, sha256) for _, sha256, _, tmp_path in items]
+        )
+        await session.commit()
+    except BaseException as exp:
+        if discard_on_error:
+            await asyncio.to_thread(_discard_files, tmp_paths)
+        if isinstance(exp, Exception):
             await session.rollback()
+        if isinstance(exp, IntegrityError):
             raise UniqueViolationError("Duplicate name files")
+        raise
+    await asyncio.to_thread(_discard_files, tmp_paths)
+    return files_user
+
+
+async def add_file_record(
+    session: AsyncSession,
+    user: User,
+    filename: str,
+    sha256: str,
+    size: int,
+    tmp_path: Path,
+    discard_on_error: bool = True,
+) -> File:
+    """
+    Регистрация файла пользователя в базе данных
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файла
+    :type user: User
+    :param filename: имя файла
+    :type filename: str
+    :param sha256: хеш SHA-256 содержимого файла
+    :type sha256: str
+    :param size: размер содержимого файла
+    :type size: int
+    :param tmp_path: путь к временному файлу с содержимым
+    :type tmp_path: Path
+    :param discard_on_error: удалять временный файл при ошибке
+    :type discard_on_error: bool
+    :rtype: File
+    :return: запись о файле
+    """
+    files_user: list[File] = await add_file_records(
+        session=session,
+        user=user,
+        items=[(filename, sha256, size, tmp_path)],
+        discard_on_error=discard_on_error,
+    )
+    return files_user[0]
 
-        async with aiofiles.open(folder_path / filename, mode="wb") as f:
-            await f.write(loadfile.file.read())
-    else:
-        logger.error("invalid format file")
-        raise ErrorInData("invalid format file")
 
+async def release_user_blobs(session: AsyncSession, user_id: UUID) -> list[str]:
+    """
+    Удаление записей о файлах пользователя и уменьшение счётчиков ссылок
+    на их содержимое (без фиксации транзакции). Содержимое, на которое больше
+    нет ссылок, удаляется из базы, а его файлы после фиксации транзакции
+    удаляет remove_unused_blobs
+    :param session: сессия
+    :type session: AsyncSession
+    :param user_id: id владельца файлов
+    :type user_id: UUID
+    :rtype: list[str]
+    :return: хеши содержимого, на которое больше нет ссылок
+    """
+    # записи о файлах удаляются до содержимого, на которое они ссылаются
+    deleted: Result = await session.execute(
+        delete(File)
+        .where(File.user_id == user_id)
+        .returning(File.blob_sha256)
+        .execution_options(synchronize_session=False)
+    )
+    counts: Counter[str] = Counter(
+        sha256 for sha256 in deleted.scalars() if sha256 is not None
+    )
+    if not counts:
+        return []
 
-async def list_files(session: AsyncSession, user_id: UUID) -> list[File]:
+    released = values(
+        column("sha256", String), column("cnt", Integer), name="released"
+    ).data(list(counts.items()))
+    stmt = (
+        update(Blob)
+        .where(Blob.sha256 == released.c.sha256)
+        .values(ref_count=Blob.ref_count - released.c.cnt)
+        .returning(Blob.sha256, Blob.ref_count)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await session.execute(stmt)
+    unused: list[str] = [sha256 for sha256, ref_count in result if ref_count <= 0]
+    if unused:
+        await session.execute(
+            delete(Blob)
+            .where(Blob.sha256.in_(unused), Blob.ref_count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+    return unused
+
+
+async def remove_unused_blobs(session: AsyncSession, sha256s: list[str]) -> None:
+    """
+    Удаление файлов содержимого, записи о котором удалены зафиксированной
+    транзакцией. Файл остаётся, если то же содержимое успели загрузить снова
+    :param session: сессия
+    :type session: AsyncSession
+    :param sha256s: хеши SHA-256 удалённого содержимого
+    :type sha256s: list[str]
+    :rtype: None
+    :return:
+    """
+    if not sha256s:
+        return
+    await lock_blobs(session=session, sha256s=sha256s)
+    result: Result = await session.execute(
+        select(Blob.sha256).filter(Blob.sha256.in_(sha256s))
+    )
+    reused: set[str] = set(result.scalars().all())
+    unused: list[Path] = [
+        get_blob_path(sha256) for sha256 in sha256s if sha256 not in reused
+    ]
+    # файлы удаляются под блокировкой: загрузка того же содержимого ждёт её
+    await asyncio.to_thread(_discard_files, unused)
+    await session.commit()
+    logger.info("Removed %d unused blobs", len(unused))
+
+
+async def load_media_file(
+    session: AsyncSession,
+    user: User,
+    loadfile: FileLoadSchemas,
+):
+    logger.info("Start write file by name %s", loadfile.new_filename)
+    extension: str = get_media_extension(loadfile.filename)
+    filename: str = loadfile.new_filename + extension
+    await check_file_name(session=session, user_id=user.id, filename=filename)
+    await release_connection(session)
+
+    sha256, size, tmp_path = await stage_blob(source=loadfile.file)
+    await add_file_record(
+        session=session,
+        user=user,
+        filename=filename,
+        sha256=sha256,
+        size=size,
+        tmp_path=tmp_path,
+    )
+    logger.info("File %s saved as blob %s", filename, sha256)
+
+
+async def load_media_files(
+    session: AsyncSession,
+    user: User,
+    loadfiles: list[FileLoadSchemas],
+    concurrency: int = setting.files.batch_concurrency,
+) -> list[FileLoadResultSchemas]:
+    """
+    Пакетная загрузка файлов: проверка всех файлов до записи, параллельное
+    сохранение содержимого с ограничением числа одновременных записей и
+    регистрация всех файлов одной транзакцией
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файлов
+    :type user: User
+    :param loadfiles: загружаемые файлы
+    :type loadfiles: list[FileLoadSchemas]
+    :param concurrency: максимальное число одновременно записываемых файлов
+    :type concurrency: int
+    :rtype: list[FileLoadResultSchemas]
+    :return: результат загрузки каждого файла
+    """
+    logger.info("Start batch load of %d files", len(loadfiles))
+    results: list[FileLoadResultSchemas] = []
+    valid: dict[int, FileLoadSchemas] = {}
+    for index, loadfile in enumerate(loadfiles):
+        result = FileLoadResultSchemas(filename=loadfile.new_filename)
+        results.append(result)
+        try:
+            if not loadfile.new_filename:
+                raise ErrorInData("The file name is not specified")
+            result.filename = loadfile.new_filename + get_media_extension(
+                loadfile.filename
+            )
+            if any(results[i].filename == result.filename for i in valid):
+                raise UniqueViolationError("Duplicate name files")
+        except (ErrorInData, UniqueViolationError) as exp:
+            result.detail = f"{exp}"
+        else:
+            valid[index] = loadfile
+
+    if valid:
+        stmt = select(File.filename).filter(
+            File.user_id == user.id,
+            File.filename.in_([results[i].filename for i in valid]),
+        )
+        result_db: Result = await session.execute(stmt)
+        existing: set[str] = set(result_db.scalars().all())
+        for index in list(valid):
+            if results[index].filename in existing:
+                results[index].detail = "Duplicate name files"
+                del valid[index]
+    await release_connection(session)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _store(loadfile: FileLoadSchemas) -> tuple[str, int, Path]:
+        async with semaphore:
+            return await stage_blob(source=loadfile.file)
+
+    stored = await asyncio.gather(
+        *(_store(loadfile) for loadfile in valid.values()), return_exceptions=True
+    )
+    items: list[tuple[str, str, int, Path]] = []
+    for index, blob in zip(list(valid), stored):
+        # gather возвращает и BaseException, например CancelledError задачи
+        if isinstance(blob, BaseException):
+            logger.error("Error write file %s", results[index].filename, exc_info=blob)
+            results[index].detail = "Error write file"
+            del valid[index]
+        else:
+            items.append((results[index].filename, *blob))
+
+    if items:
+        try:
+            await add_file_records(session=session, user=user, items=items)
+        except UniqueViolationError as exp:
+            for index in valid:
+                results[index].detail = f"{exp}"
+        else:
+            for index in valid:
+                results[index].status = "OK"
+    return results
+
+
+async def load_media_stream(
+    session: AsyncSession,
+    user: User,
+    filename: str,
+    stream: AsyncIterator[bytes],
+) -> int:
+    """
+    Загрузка файла из тела запроса без разбора multipart/form-data
+    :param session: сессия
+    :type session: AsyncSession
+    :param user: владелец файла
+    :type user: User
+    :param filename: имя файла вместе с расширением
+    :type filename: str
+    :param stream: поток данных тела запроса
+    :type stream: AsyncIterator[bytes]
+    :rtype: int
+    :return: количество записанных байт
+    """
+    logger.info("Start write stream by name %s", filename)
+    if Path(filename).name != filename:
+        raise ErrorInData("invalid file name")
+    get_media_extension(filename)
+    await check_file_name(session=session, user_id=user.id, filename=filename)
+    await release_connection(session)
+
+    tmp_path: Path = await asyncio.to_thread(get_blob_tmp_path)
+    digest = hashlib.sha256()
+    size: int = 0
+    try:
+        async with aiofiles.open(tmp_path, mode="wb") as f:
+            async for chunk in stream:
+                digest.update(chunk)
+                await f.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        logger.error("Stream for file %s interrupted", filename)
+        await asyncio.to_thread(_discard_files, [tmp_path])
+        raise
+
+    sha256: str = digest.hexdigest()
+    await add_file_record(
+        session=session,
+        user=user,
+        filename=filename,
+        sha256=sha256,
+        size=size,
+        tmp_path=tmp_path,
+    )
+    logger.info(
+        "File %s written from stream as blob %s, %d bytes", filename, sha256, size
+    )
+    return size
+
+
+def encode_cursor(value: Any, id_file: UUID) -> str:
+    """
+    Курсор для постраничной выборки: значение поля сортировки и id последней записи
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    data: bytes = json.dumps([value, str(id_file)]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str, sort_by: FilesSortBy) -> tuple[Any, UUID]:
+    """
+    Разбор курсора постраничной выборки. Оба поля курсора - строки: имя файла
+    или дата регистрации в формате ISO и id записи
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not (
+            isinstance(data, list)
+            and len(data) == 2
+            and all(isinstance(item, str) for item in data)
+        ):
+            raise ValueError("invalid cursor fields")
+        value, id_file = data
+        if sort_by == "registered_at":
+            value = datetime.fromisoformat(value)
+        return value, UUID(id_file)
+    except (ValueError, TypeError):
+        raise ErrorInData("invalid cursor")
+
+
+async def list_files(
+    session: AsyncSession,
+    user_id: UUID,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: FilesSortBy = "registered_at",
+    order: SortOrder = "asc",
+) -> tuple[list[Row], Optional[str]]:
+    """
+    Постраничная выборка файлов пользователя по ключу (keyset pagination)
+    :param session: сессия
+    :type session: AsyncSession
+    :param user_id: id владельца файлов
+    :type user_id: UUID
+    :param limit: количество записей на странице
+    :type limit: int
+    :param cursor: курсор, полученный с предыдущей страницей
+    :type cursor: Optional[str]
+    :param sort_by: поле сортировки
+    :type sort_by: FilesSortBy
+    :param order: направление сортировки
+    :type order: SortOrder
+    :rtype: tuple[list[Row], Optional[str]]
+    :return: записи страницы и курсор следующей страницы
+    """
     logger.info("Get list files for user with id: %s", user_id)
 
-    stmt = select(File).filter(File.user_id == user_id)
+    sort_column = getattr(File, sort_by)
+    stmt = select(File.id, File.filename, File.path_file, sort_column).filter(
+        File.user_id == user_id
+    )
+    if cursor is not None:
+        value, id_file = decode_cursor(cursor, sort_by)
+        key = tuple_(sort_column, File.id)
+        stmt = stmt.filter(
+            key > (value, id_file) if order == "asc" else key < (value, id_file)
+        )
+    if order == "asc":
+        stmt = stmt.order_by(sort_column.asc(), File.id.asc())
+    else:
+        stmt = stmt.order_by(sort_column.desc(), File.id.desc())
+    stmt = stmt.limit(limit + 1)
+
+    result: Result = await session.execute(stmt)
+    files = list(result.all())
+
+    next_cursor: Optional[str] = None
+    if len(files) > limit:
+        files = files[:limit]
+        last: Row = files[-1]
+        next_cursor = encode_cursor(getattr(last, sort_by), last.id)
+    return files, next_cursor
+
+
+async def get_file_by_id(session: AsyncSession, user_id: UUID, file_id: UUID) -> File:
+    """
+    :param session: сессия
+    :type session: AsyncSession
+    :param user_id: id владельца файла
+    :type user_id: UUID
+    :param file_id: id файла
+    :type file_id: UUID
+    :rtype: File
+    :return: запись о файле пользователя
+    """
+    stmt = select(File).filter(File.id == file_id, File.user_id == user_id)
     result: Result = await session.execute(stmt)
-    files = result.scalars().all()
+    file_user = result.scalar_one_or_none()
+    if file_user is None:
+        raise NotFindFile(f"File with id {file_id} not found")
+    return file_user
+
 
-    return list(files)
+def get_file_path(file_user: File) -> Path:
+    """
+    :param file_user: запись о файле
+    :type file_user: File
+    :rtype: Path
+    :return: полный путь к файлу на диске
+    """
+    # у файлов в хранилище по хешу path_file - путь к самому файлу содержимого,
+    # у файлов, загруженных до него, - каталог, в котором файл лежит под своим именем
+    if file_user.blob_sha256 is not None:
+        return get_blob_path(file_user.blob_sha256)
+    return BASE_DIR / file_user.path_file / file_user.filename
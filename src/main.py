@@ -1,7 +1,9 @@
+from contextlib import asynccontextmanager
+from math import ceil
 from typing import Annotated
 import logging
 
-from fastapi import FastAPI, Depends, status, Request
+from fastapi import FastAPI, Depends, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import HTTPException
@@ -12,21 +14,36 @@ from starlette.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import uvicorn
 
-from src.core.config import COOKIE_NAME, configure_logging, templates
-from src.core.database import get_async_session
+from src.core.config import COOKIE_NAME, templates
+from src.core.database import engine, replica_engine, get_async_session
 from src.core.jwt_utils import create_jwt, validate_password
 from src.users.crud import (
     get_user_from_db,
 )
 from src.core.exceptions import (
     NotFindUser,
+    ServerBusy,
+    TooManyRequests,
 )
 from src.users.models import User
 from src.users.routers import router as router_users
 from src.files.routers import router as router_files
+from src.files.resumable import UploadSessionCleaner
 from src.auth.routers import router as router_auth
-from src.core.config import setting_conn, STATIC_DIR
-
+from src.admin.routers import router as router_admin
+from src.core.config import setting, setting_conn, STATIC_DIR
+from src.core.executor import password_executor
+from src.core.http_client import http_client
+from src.core.log import RequestIdMiddleware, setup_logging, shutdown_logging
+from src.core.loop_monitor import loop_monitor
+from src.core.metrics import MetricsMiddleware, render_metrics
+from src.core.profiler import ProfilerMiddleware
+from src.core.proxy import ProxyHeadersMiddleware
+from src.core.query_stats import QueryStatsMiddleware, instrument_engine
+from src.auth.rate_limit import login_limiter
+from src.users.cache import UserCacheListener
+
+setup_logging()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -41,11 +58,29 @@ description = """
 """
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    user_cache_listener = UserCacheListener()
+    user_cache_listener.start()
+    upload_session_cleaner = UploadSessionCleaner()
+    upload_session_cleaner.start()
+    http_client.start()
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    await upload_session_cleaner.stop()
+    await http_client.stop()
+    await user_cache_listener.stop()
+    password_executor.shutdown()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="API_LoadFile",
     description=description,
     version="0.1.0",
     docs_url="/docs",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -57,16 +92,44 @@ app.add_middleware(
 )
 
 app.add_middleware(SessionMiddleware, secret_key=setting_conn.SECRET_KEY)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(RequestIdMiddleware)
+# адрес клиента за обратным прокси берется из X-Forwarded-For, иначе все
+# клиенты получают адрес прокси (например, в лимите попыток входа по IP)
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=setting.proxy.trusted_hosts)
+instrument_engine(engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 app.include_router(router_users)
 app.include_router(router_files)
 app.include_router(router_auth)
+app.include_router(router_admin)
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@app.exception_handler(ServerBusy)
+async def server_busy_exception_handler(request: Request, exc: ServerBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "The server is busy, please try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(TooManyRequests)
+async def too_many_requests_exception_handler(request: Request, exc: TooManyRequests):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many login attempts, please try again later"},
+        headers={"Retry-After": str(ceil(exc.retry_after))},
+    )
+
+
 @app.post(
     "/token",
     response_class=JSONResponse,
@@ -75,9 +138,13 @@ logger = logging.getLogger(__name__)
     include_in_schema=False,
 )
 async def login_for_access_token(
+    request: Request,
     data_login: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: AsyncSession = Depends(get_async_session),
 ):
+    await login_limiter.check(
+        email=data_login.username, ip=request.client and request.client.host
+    )
     try:
         user: User = await get_user_from_db(session=session, email=data_login.username)
     except NotFindUser:
@@ -101,6 +168,12 @@ async def login_for_access_token(
         )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
 @app.get("/", include_in_schema=False)
 async def index(request: Request):
     user = request.session.get("user")
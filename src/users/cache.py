@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import func, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.core.cache import TTLCache
+from src.core.config import setting
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_CHANNEL = "user_cache_invalidate"
+
+user_cache: TTLCache[UUID, User] = TTLCache(
+    max_size=setting.cache.user_max_size,
+    ttl=setting.cache.user_ttl,
+)
+
+
+def cache_user(user: User) -> None:
+    """
+    Сохранение в кеше отсоединённой от сессии копии пользователя
+    """
+    mapper = inspect(User)
+    copy_user = User(
+        **{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs}
+    )
+    make_transient_to_detached(copy_user)
+    user_cache.set(user.id, copy_user)
+
+
+async def get_cached_user(session: AsyncSession, id_user: UUID) -> Optional[User]:
+    """
+    :param session: сессия
+    :type session: AsyncSession
+    :param id_user: id пользователя
+    :type id_user: UUID
+    :rtype: Optional[User]
+    :return: пользователь из кеша, присоединённый к сессии без запроса к БД
+    """
+    cached_user: Optional[User] = user_cache.get(id_user)
+    if cached_user is None:
+        return None
+    return await session.merge(cached_user, load=False)
+
+
+async def notify_user_changed(session: AsyncSession, id_user: UUID) -> None:
+    """
+    Оповещение других процессов об изменении пользователя. Уведомление
+    доставляется при фиксации текущей транзакции
+    """
+    await session.execute(select(func.pg_notify(USER_CACHE_CHANNEL, str(id_user))))
+
+
+def invalidate_user(id_user: UUID) -> None:
+    user_cache.pop(id_user)
+
+
+class UserCacheListener:
+    """
+    Фоновая задача, принимающая через LISTEN/NOTIFY уведомления об изменении
+    пользователей от других процессов и удаляющая их из локального кеша
+    """
+
+    def __init__(self, url: str = setting.db.url, retry_delay: float = 5) -> None:
+        self.dsn = (
+            make_url(url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.retry_delay = retry_delay
+        self.connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _on_notify(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        try:
+            invalidate_user(UUID(payload))
+        except ValueError:
+            logger.warning("Invalid payload in channel %s: %s", channel, payload)
+
+    async def _run(self) -> None:
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(USER_CACHE_CHANNEL, self._on_notify)
+                # уведомления, отправленные до подключения, потеряны
+                user_cache.clear()
+                self.connected.set()
+                logger.info("Listening channel %s", USER_CACHE_CHANNEL)
+                await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error listening channel %s", USER_CACHE_CHANNEL)
+            finally:
+                self.connected.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.retry_delay)
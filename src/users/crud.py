@@ -1,13 +1,12 @@
 import logging
-from typing import Optional, Union
+from typing import AsyncIterator, Optional, Union
 from uuid import UUID
 
 from sqlalchemy import select
-from sqlalchemy.engine import Result
+from sqlalchemy.engine import Result, Row
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncResult, AsyncSession
 
-from src.core.config import configure_logging
 from src.core.exceptions import (
     UniqueViolationError,
     NotFindUser,
@@ -15,6 +14,13 @@ from src.core.exceptions import (
     ErrorInData,
 )
 from src.core.jwt_utils import create_hash_password
+from src.files.utils import release_user_blobs, remove_unused_blobs
+from src.users.cache import (
+    cache_user,
+    get_cached_user,
+    invalidate_user,
+    notify_user_changed,
+)
 from src.users.models import User
 from src.users.schemas import (
     UserCreateSchemas,
@@ -24,7 +30,6 @@ from src.users.schemas import (
 )
 
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -37,7 +42,7 @@ async def find_user_by_email(session: AsyncSession, email: str) -> Optional[User
     :rtype: Optional[User]
     :return: возвращает результат поиска пользователя по email, в т.ч. None
     """
-    logger.info("User find by email %s" % email)
+    logger.info("User find by email %s", email)
     stmt = select(User).filter(User.email == email)
     result: Result = await session.execute(stmt)
     return result.scalar_one_or_none()
@@ -55,7 +60,7 @@ async def get_user_from_db(session: AsyncSession, email: str) -> User:
     user: Optional[User] = await find_user_by_email(session=session, email=email)
 
     if not user:
-        logger.info("User with eail %s not find" % email)
+        logger.info("User with email %s not found", email)
         raise NotFindUser(f"Not find user with {email}")
     logger.info("User has benn found")
     return user
@@ -70,10 +75,31 @@ async def get_user_by_id(session: AsyncSession, id_user: UUID) -> Optional[User]
     :rtype: Optional[User]
     :return: возвращает пользователя по его id
     """
-    logger.info("User request by id %d" % id_user)
+    logger.info("User request by id %s", id_user)
     return await session.get(User, id_user)
 
 
+async def get_user_by_id_cached(session: AsyncSession, id_user: UUID) -> Optional[User]:
+    """
+    Получение пользователя по id с использованием кеша в памяти процесса.
+    При промахе кеша пользователь читается с основной базы: отстающая реплика
+    после инвалидации вернула бы прежние права или удалённого пользователя,
+    и они попали бы в кеш
+    :param session: сессия
+    :type session: AsyncSession
+    :param id_user: id пользователя
+    :type id_user: UUID
+    :rtype: Optional[User]
+    :return: возвращает пользователя по его id
+    """
+    user: Optional[User] = await get_cached_user(session=session, id_user=id_user)
+    if user is None:
+        user = await get_user_by_id(session=session, id_user=id_user)
+        if user is not None:
+            cache_user(user)
+    return user
+
+
 async def create_user(session: AsyncSession, user_data: UserCreateSchemas) -> User:
     """
     :param session: сессия
@@ -83,7 +109,7 @@ async def create_user(session: AsyncSession, user_data: UserCreateSchemas) -> Us
     :rtype: User
     :return: возвращает нового пользователя
     """
-    logger.info("Start create user with email %s" % user_data.email)
+    logger.info("Start create user with email %s", user_data.email)
     result: Optional[User] = await find_user_by_email(
         session=session, email=user_data.email
     )
@@ -100,7 +126,7 @@ async def create_user(session: AsyncSession, user_data: UserCreateSchemas) -> Us
 
         session.add(new_user)
         await session.commit()
-        logger.info("User with email %s created" % user_data.email)
+        logger.info("User with email %s created", user_data.email)
         return new_user
 
 
@@ -115,9 +141,7 @@ async def create_user_without_password(
     :rtype: User
     :return: возвращает нового пользователя
     """
-    logger.info(
-        "Start create user (without a password) with email %s" % user_data.email
-    )
+    logger.info("Start create user (without a password) with email %s", user_data.email)
 
     try:
         new_user: User = User(**user_data.model_dump())
@@ -126,22 +150,72 @@ async def create_user_without_password(
     else:
         session.add(new_user)
         await session.commit()
-        logger.info("User with email %s created" % user_data.email)
+        logger.info("User with email %s created", user_data.email)
         return new_user
 
 
-async def get_users(session: AsyncSession) -> list[User]:
+USER_LIST_COLUMNS = (User.id, User.full_name, User.email, User.registered_at)
+
+
+async def get_users(
+    session: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[UUID] = None,
+) -> tuple[list[Row], Optional[UUID]]:
     """
+    Постраничная выборка пользователей по ключу (keyset pagination)
     :param session: сессия
     :type session: AsyncSession
-    :rtype: list[User]
-    :return: возвращает список пользователей
+    :param limit: количество записей на странице
+    :type limit: int
+    :param cursor: id последнего пользователя предыдущей страницы
+    :type cursor: Optional[UUID]
+    :rtype: tuple[list[Row], Optional[UUID]]
+    :return: возвращает список пользователей и курсор следующей страницы
     """
     logger.info("Get list users")
-    stmt = select(User).order_by(User.id)
+    stmt = select(*USER_LIST_COLUMNS).order_by(User.id).limit(limit + 1)
+    if cursor is not None:
+        stmt = stmt.where(User.id > cursor)
     result: Result = await session.execute(stmt)
-    users = result.scalars().all()
-    return list(users)
+    users: list[Row] = list(result.all())
+
+    next_cursor: Optional[UUID] = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = users[-1].id
+    return users, next_cursor
+
+
+async def stream_users(
+    bind: AsyncEngine,
+    cursor: Optional[UUID] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Row]:
+    """
+    Выгрузка всех пользователей через серверный курсор. Использует отдельную
+    сессию, так как сессия запроса закрывается до отправки ответа
+    :param bind: движок базы данных
+    :type bind: AsyncEngine
+    :param cursor: id пользователя, после которого начинается выгрузка
+    :type cursor: Optional[UUID]
+    :param batch_size: количество строк, получаемых из курсора за раз
+    :type batch_size: int
+    :rtype: AsyncIterator[Row]
+    :return: пользователи
+    """
+    logger.info("Stream list users")
+    stmt = (
+        select(*USER_LIST_COLUMNS)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if cursor is not None:
+        stmt = stmt.where(User.id > cursor)
+    async with AsyncSession(bind) as session:
+        result: AsyncResult = await session.stream(stmt)
+        async for row in result:
+            yield row
 
 
 async def update_user_db(
@@ -168,12 +242,14 @@ async def update_user_db(
             exclude_unset=partial
         ).items():  # Преобразовываем объект в словарь
             setattr(user, name, value)
+        await notify_user_changed(session=session, id_user=user.id)
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise UniqueViolationError(
             "Duplicate key value violates unique constraint users_email_key"
         )
+    invalidate_user(user.id)
     return user
 
 
@@ -186,6 +262,12 @@ async def delete_user_db(session: AsyncSession, user: User) -> None:
     :rtype: None
     :return:
     """
-    logger.info("Delete user by id %d" % user.id)
+    logger.info("Delete user by id %s", user.id)
+    unused_blobs: list[str] = await release_user_blobs(
+        session=session, user_id=user.id
+    )
+    await notify_user_changed(session=session, id_user=user.id)
     await session.delete(user)
     await session.commit()
+    invalidate_user(user.id)
+    await remove_unused_blobs(session=session, sha256s=unused_blobs)
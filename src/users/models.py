@@ -1,4 +1,5 @@
 from datetime import datetime
+import uuid
 from uuid import uuid4
 from typing import Optional, TYPE_CHECKING
 
@@ -14,7 +15,7 @@ if TYPE_CHECKING:
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[UUID] = mapped_column(
+    id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
@@ -29,7 +30,6 @@ class User(Base):
     )
     hashed_password: Mapped[str] = mapped_column(String, nullable=True)
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
-    refresh_token: Mapped[str] = mapped_column(String, nullable=True)
 
     files: Mapped[list["File"]] = relationship(
         back_populates="user",
@@ -1,12 +1,18 @@
 import logging
+from typing import AsyncIterator, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.exceptions import HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 
-from src.core.database import get_async_session
-from src.core.config import configure_logging
+from src.core.database import (
+    get_async_session,
+    get_async_session_read,
+    get_read_engine,
+)
 from src.core.exceptions import (
     ErrorInData,
     EmailInUse,
@@ -15,9 +21,9 @@ from src.core.exceptions import (
 from src.users.crud import (
     create_user,
     get_users,
+    stream_users,
     update_user_db,
     delete_user_db,
-    find_user_by_email,
 )
 from src.core.depends import (
     current_superuser_user,
@@ -34,7 +40,6 @@ from src.users.schemas import (
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -44,10 +49,31 @@ logger = logging.getLogger(__name__)
     status_code=status.HTTP_200_OK,
 )
 async def get_list_users(
-    session: AsyncSession = Depends(get_async_session),
+    response: Response,
+    cursor: Optional[UUID] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    stream: bool = False,
+    session: AsyncSession = Depends(get_async_session_read),
+    read_engine: AsyncEngine = Depends(get_read_engine),
     user: User = Depends(current_superuser_user),
 ):
-    return await get_users(session=session)
+    if stream:
+        return StreamingResponse(
+            _users_ndjson(bind=read_engine, cursor=cursor),
+            media_type="application/x-ndjson",
+        )
+
+    users, next_cursor = await get_users(session=session, limit=limit, cursor=cursor)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return users
+
+
+async def _users_ndjson(
+    bind: AsyncEngine, cursor: Optional[UUID]
+) -> AsyncIterator[str]:
+    async for row in stream_users(bind=bind, cursor=cursor):
+        yield OutUserSchemas.model_validate(row).model_dump_json() + "\n"
 
 
 @router.get(
@@ -56,10 +82,9 @@ async def get_list_users(
     status_code=status.HTTP_200_OK,
 )
 async def get_info_about_me(
-    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_user_authorization_cookie),
 ):
-    return await find_user_by_email(session=session, email=user.email)
+    return user
 
 
 @router.post(
@@ -43,6 +43,10 @@ class UserCreateSchemas(UserBaseSchemas):
         return value
 
 
+class UserImportSchemas(UserCreateSchemas):
+    is_superuser: bool = False
+
+
 class OutUserSchemas(UserBaseSchemas):
     registered_at: datetime
     id: UUID4 = Field(default_factory=uuid4)
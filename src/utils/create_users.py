@@ -8,9 +8,8 @@ from src.core.database import async_session_maker
 from src.users.models import User
 from src.users.crud import create_user
 from src.users.schemas import UserCreateSchemas
-from src.core.config import configure_logging
+from src.core.log import setup_logging
 
-configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -44,4 +43,5 @@ async def create_new_users() -> None:
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(create_new_users())
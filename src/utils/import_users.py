@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Literal, Optional
+from uuid import uuid4
+
+import asyncpg
+import bcrypt
+from pydantic import ValidationError
+from sqlalchemy.engine import make_url
+
+from src.core.config import setting
+from src.core.log import setup_logging
+from src.users.cache import USER_CACHE_CHANNEL
+from src.users.schemas import UserImportSchemas
+
+logger = logging.getLogger(__name__)
+
+OnConflict = Literal["skip", "update"]
+
+COPY_COLUMNS = ["id", "full_name", "email", "hashed_password", "is_superuser"]
+
+
+@dataclass(slots=True)
+class ImportStats:
+    read: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    inserted: int = 0
+    updated: int = 0
+    hash_seconds: float = 0
+    load_seconds: float = 0
+    total_seconds: float = 0
+
+    def __str__(self) -> str:
+        rate: float = self.read / self.total_seconds if self.total_seconds else 0
+        return (
+            f"read={self.read} invalid={self.invalid} duplicates={self.duplicates} "
+            f"skipped={self.skipped} inserted={self.inserted} updated={self.updated} "
+            f"hashing={self.hash_seconds:.2f}s load={self.load_seconds:.2f}s "
+            f"total={self.total_seconds:.2f}s ({rate:.1f} rows/s)"
+        )
+
+
+def read_rows(path: Path) -> Iterator[tuple[int, Optional[dict]]]:
+    """
+    Чтение пользователей из CSV (с заголовком) или JSONL файла
+    :param path: путь к файлу
+    :type path: Path
+    :rtype: Iterator[tuple[int, Optional[dict]]]
+    :return: номер строки и данные пользователя, None - если строка не JSON
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.suffix.lower() == ".csv":
+            for line_no, row in enumerate(csv.DictReader(file), start=2):
+                yield line_no, {k: v for k, v in row.items() if v not in ("", None)}
+        else:
+            for line_no, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        data: Optional[dict] = json.loads(line)
+                    except json.JSONDecodeError:
+                        data = None
+                    yield line_no, data
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    Хеширование паролей, выполняется в дочернем процессе
+    """
+    return [bcrypt.hashpw(p.encode(), bcrypt.gensalt()).decode() for p in passwords]
+
+
+async def _hash_all(
+    pool: ProcessPoolExecutor, passwords: list[str], workers: int
+) -> list[str]:
+    loop = asyncio.get_running_loop()
+    size: int = max(1, -(-len(passwords) // (workers * 4)))
+    chunks = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, hash_passwords, passwords[i : i + size])
+            for i in range(0, len(passwords), size)
+        )
+    )
+    return [hashed for chunk in chunks for hashed in chunk]
+
+
+async def _load_batch(
+    connection: asyncpg.Connection,
+    pool: ProcessPoolExecutor,
+    users: list[UserImportSchemas],
+    on_conflict: OnConflict,
+    workers: int,
+    stats: ImportStats,
+) -> None:
+    if on_conflict == "skip":
+        # существующих пользователей отбрасываем до хеширования паролей
+        existing: set[str] = {
+            r["email"]
+            for r in await connection.fetch(
+                "SELECT email FROM users WHERE email = ANY($1::text[])",
+                [u.email for u in users],
+            )
+        }
+        stats.skipped += sum(u.email in existing for u in users)
+        users = [u for u in users if u.email not in existing]
+        if not users:
+            return
+
+    start: float = time.perf_counter()
+    hashed: list[str] = await _hash_all(
+        pool, [u.hashed_password for u in users], workers
+    )
+    stats.hash_seconds += time.perf_counter() - start
+
+    start = time.perf_counter()
+    if on_conflict == "update":
+        conflict = (
+            "DO UPDATE SET full_name = EXCLUDED.full_name, "
+            "hashed_password = EXCLUDED.hashed_password"
+        )
+    else:
+        conflict = "DO NOTHING"
+    async with connection.transaction():
+        await connection.execute(
+            "CREATE TEMP TABLE users_import "
+            "(LIKE users INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        await connection.copy_records_to_table(
+            "users_import",
+            records=[
+                (uuid4(), u.full_name, u.email, h, u.is_superuser)
+                for u, h in zip(users, hashed)
+            ],
+            columns=COPY_COLUMNS,
+        )
+        result = await connection.fetch(
+            f"INSERT INTO users ({', '.join(COPY_COLUMNS)}, registered_at) "
+            f"SELECT {', '.join(COPY_COLUMNS)}, registered_at FROM users_import "
+            f"ON CONFLICT (email) {conflict} "
+            "RETURNING id, (xmax = 0) AS inserted"
+        )
+        updated = [r["id"] for r in result if not r["inserted"]]
+        if updated:
+            # сброс кеша пользователей в работающих процессах приложения
+            await connection.execute(
+                "SELECT pg_notify($1, id::text) FROM unnest($2::uuid[]) AS id",
+                USER_CACHE_CHANNEL,
+                updated,
+            )
+    stats.inserted += len(result) - len(updated)
+    stats.updated += len(updated)
+    stats.skipped += len(users) - len(result)
+    stats.load_seconds += time.perf_counter() - start
+
+
+async def import_users(
+    path: Path,
+    on_conflict: OnConflict = "skip",
+    workers: Optional[int] = None,
+    batch_size: int = 5000,
+    url: str = setting.db.url,
+) -> ImportStats:
+    """
+    Массовый импорт пользователей: пароли хешируются в пуле процессов,
+    строки загружаются через COPY во временную таблицу и переносятся в users
+    одним INSERT ... ON CONFLICT на пакет
+    :param path: путь к CSV или JSONL файлу
+    :type path: Path
+    :param on_conflict: skip - пропускать существующие email, update - обновлять
+    :type on_conflict: OnConflict
+    :param workers: количество процессов для хеширования
+    :type workers: Optional[int]
+    :param batch_size: размер пакета
+    :type batch_size: int
+    :param url: адрес базы данных
+    :type url: str
+    :rtype: ImportStats
+    :return: статистика импорта
+    """
+    stats = ImportStats()
+    workers = workers or os.cpu_count() or 1
+    start: float = time.perf_counter()
+    dsn: str = (
+        make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    )
+
+    connection: asyncpg.Connection = await asyncpg.connect(dsn)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            seen: set[str] = set()
+            batch: list[UserImportSchemas] = []
+            for line_no, row in read_rows(path):
+                stats.read += 1
+                if row is None:
+                    stats.invalid += 1
+                    logger.warning("Line %s: invalid JSON", line_no)
+                    continue
+                try:
+                    user = UserImportSchemas.model_validate(row)
+                except ValidationError as exp:
+                    stats.invalid += 1
+                    logger.warning(
+                        "Line %s: invalid data: %s",
+                        line_no,
+                        ", ".join(str(e["loc"][0]) for e in exp.errors() if e["loc"]),
+                    )
+                    continue
+                if user.email in seen:
+                    stats.duplicates += 1
+                    continue
+                seen.add(user.email)
+                batch.append(user)
+
+                if len(batch) >= batch_size:
+                    await _load_batch(
+                        connection, pool, batch, on_conflict, workers, stats
+                    )
+                    logger.info("Imported %s rows", stats.read)
+                    batch = []
+            if batch:
+                await _load_batch(connection, pool, batch, on_conflict, workers, stats)
+    finally:
+        await connection.close()
+
+    stats.total_seconds = time.perf_counter() - start
+    return stats
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Bulk import of users")
+    parser.add_argument("path", type=Path, help="CSV or JSONL file")
+    parser.add_argument("--on-conflict", choices=["skip", "update"], default="skip")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    stats: ImportStats = asyncio.run(
+        import_users(
+            path=args.path,
+            on_conflict=args.on_conflict,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+    )
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
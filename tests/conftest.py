@@ -1,7 +1,11 @@
 import asyncio
-from typing import AsyncGenerator, Generator
+from pathlib import Path
+from typing import AsyncGenerator, Generator, Optional
 
+import pytest
 import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.engine import Result
@@ -12,7 +16,12 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from src.core.database import Base, get_async_session
+from src.auth.rate_limit import login_limiter
+from src.core.config import setting
+from src.core.database import Base, get_async_session, get_read_engine
+from src.core.http_client import http_client
+from src.core.loop_monitor import LoopMonitor, loop_monitor
+from src.files import resumable, utils as files_utils
 from src.main import app
 from src.users.models import User
 from src.core.jwt_utils import create_hash_password
@@ -28,6 +37,36 @@ def event_loop(request) -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+@pytest_asyncio.fixture(loop_scope="session", scope="session", autouse=True)
+async def event_loop_monitor(event_loop) -> AsyncGenerator[LoopMonitor, None]:
+    loop_monitor.start()
+    yield loop_monitor
+    await loop_monitor.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_event_loop_stalls(request, event_loop_monitor: LoopMonitor) -> Generator:
+    # тест падает, если во время его выполнения цикл событий был заблокирован
+    # дольше порога; намеренно блокирующие тесты помечаются blocks_event_loop
+    event_loop_monitor.stalls.clear()
+    yield
+    if request.node.get_closest_marker("blocks_event_loop") is None:
+        stalls = list(event_loop_monitor.stalls)
+        assert not stalls, f"Event loop was blocked at:\n{stalls[0].stack}"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def upload_dir(tmp_path_factory: pytest.TempPathFactory) -> Generator[Path, None, None]:
+    # загруженные в тестах файлы сохраняются во временный каталог,
+    # а не в каталог upload проекта
+    base_dir: Path = tmp_path_factory.mktemp("base")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(files_utils, "BASE_DIR", base_dir)
+        mp.setattr(files_utils, "BLOBS_DIR", base_dir / "upload" / "blobs")
+        mp.setattr(resumable, "UPLOAD_SESSIONS_DIR", base_dir / "upload" / ".sessions")
+        yield base_dir / "upload"
+
+
 @pytest_asyncio.fixture(loop_scope="session", scope="session")
 async def db_engine() -> AsyncGenerator[AsyncEngine, None]:
     engine: AsyncEngine = create_async_engine(SQLALCHEMY_DATABASE_URL)
@@ -62,8 +101,10 @@ def override_get_db(db_session: AsyncSession):
 
 
 @pytest_asyncio.fixture(loop_scope="session", scope="function")
-async def client(override_get_db) -> AsyncGenerator[AsyncClient, None]:
+async def client(override_get_db, db_engine) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides[get_async_session] = override_get_db
+    app.dependency_overrides[get_read_engine] = lambda: db_engine
+    await login_limiter.store.clear()
     async with AsyncClient(app=app, base_url="http://") as c:
         yield c
 
@@ -97,3 +138,49 @@ async def token_admin(
     )
     token: str = token_response.json()["access_token"]
     return token
+
+
+class YandexStub:
+    """
+    Локальная замена https://login.yandex.ru/info для тестов и замеров
+    """
+
+    def __init__(self) -> None:
+        self.users: dict[str, dict] = dict()
+        self.fail_next: int = 0
+        self.requests: int = 0
+        self.peers: set = set()
+
+    async def info(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return web.Response(status=503)
+        token: str = request.headers.get("Authorization", "").removeprefix("OAuth ")
+        user: Optional[dict] = self.users.get(token)
+        if user is None:
+            return web.Response(status=401)
+        return web.json_response(user)
+
+
+@pytest_asyncio.fixture(loop_scope="session", scope="function")
+async def yandex_stub() -> AsyncGenerator[YandexStub, None]:
+    stub = YandexStub()
+    app_stub = web.Application()
+    app_stub.router.add_get("/info", stub.info)
+    server = TestServer(app_stub)
+    await server.start_server()
+
+    url: str = setting.http.yandex_info_url
+    backoff: float = setting.http.backoff
+    setting.http.yandex_info_url = str(server.make_url("/info"))
+    setting.http.backoff = 0.01
+    http_client.start()
+
+    yield stub
+
+    await http_client.stop()
+    setting.http.yandex_info_url = url
+    setting.http.backoff = backoff
+    await server.close()
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.auth.crud import hash_refresh_token
+from src.auth.models import RefreshToken
+from src.core.config import COOKIE_NAME, REFRESH_COOKIE_NAME
+from src.users.models import User
+
+
+async def test_refresh_token_rotation(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    db_engine: AsyncEngine,
+    test_user_admin: User,
+):
+    response = await client.post(
+        "/auth/login",
+        json={"email": test_user_admin.email, "password": "1qaz!QAZ"},
+    )
+    assert response.status_code == 202
+    refresh_token: str = response.cookies[REFRESH_COOKIE_NAME]
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = await client.post(
+            "/auth/refresh", cookies={REFRESH_COOKIE_NAME: refresh_token}
+        )
+    finally:
+        event.remove(
+            db_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+    new_refresh_token: str = response.cookies[REFRESH_COOKIE_NAME]
+    assert new_refresh_token != refresh_token
+    # строка users не загружается: удаление старого токена, удаление истёкших
+    # токенов пользователя и вставка нового
+    assert len(statements) == 3, statements
+    assert all("users" not in statement for statement in statements)
+
+    response = await client.get(
+        "/users/me", cookies={COOKIE_NAME: response.json()["access_token"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == test_user_admin.email
+
+    # повторное использование старого refresh-токена запрещено
+    response = await client.post(
+        "/auth/refresh", cookies={REFRESH_COOKIE_NAME: refresh_token}
+    )
+    assert response.status_code == 401
+
+    await client.get("/auth/logout", cookies={REFRESH_COOKIE_NAME: new_refresh_token})
+    response = await client.post(
+        "/auth/refresh", cookies={REFRESH_COOKIE_NAME: new_refresh_token}
+    )
+    assert response.status_code == 401
+
+
+async def test_expired_refresh_tokens_removed_on_login(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    db_session: AsyncSession,
+    test_user_admin: User,
+):
+    expired_hash: str = hash_refresh_token("expired-refresh-token")
+    db_session.add(
+        RefreshToken(
+            token_hash=expired_hash,
+            user_id=test_user_admin.id,
+            expires_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+        )
+    )
+    await db_session.commit()
+
+    response = await client.post(
+        "/auth/login",
+        json={"email": test_user_admin.email, "password": "1qaz!QAZ"},
+    )
+    assert response.status_code == 202
+
+    result = await db_session.execute(
+        select(RefreshToken.token_hash).where(
+            RefreshToken.user_id == test_user_admin.id
+        )
+    )
+    token_hashes = result.scalars().all()
+    assert expired_hash not in token_hashes
+    assert hash_refresh_token(response.cookies[REFRESH_COOKIE_NAME]) in token_hashes
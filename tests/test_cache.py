@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import time
+
+import jwt
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.core import jwt_utils
+from src.core.cache import TTLCache
+from src.core.config import setting, setting_conn
+from src.core.jwt_utils import create_jwt, decode_jwt_cached
+from src.users.cache import USER_CACHE_CHANNEL, UserCacheListener, user_cache
+from src.users.models import User
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+async def test_ttl_cache_expiry_and_size(
+    event_loop: asyncio.AbstractEventLoop,
+):
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+async def test_authorized_user_loaded_from_cache(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+    db_session: AsyncSession,
+):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    await client.get("/files/list", headers=headers)
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = await client.get("/files/list", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    assert not any("FROM users" in statement for statement in statements)
+
+
+async def test_user_cache_invalidated_by_notify(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    test_user_admin: User,
+):
+    listener = UserCacheListener(url=SQLALCHEMY_DATABASE_URL, retry_delay=0.1)
+    listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), timeout=5)
+        user_cache.set(test_user_admin.id, test_user_admin)
+
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                select(func.pg_notify(USER_CACHE_CHANNEL, str(test_user_admin.id)))
+            )
+
+        for _ in range(50):
+            if user_cache.get(test_user_admin.id) is None:
+                break
+            await asyncio.sleep(0.05)
+        assert user_cache.get(test_user_admin.id) is None
+    finally:
+        await listener.stop()
+
+
+async def test_decode_jwt_cached(
+    event_loop: asyncio.AbstractEventLoop,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    calls = []
+    original_decode = jwt_utils.decode_jwt
+
+    async def counting_decode(*args, **kwargs):
+        calls.append(args)
+        return await original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_utils, "decode_jwt", counting_decode)
+
+    token = await create_jwt(user="user-id", expire_minutes=5)
+    assert (await decode_jwt_cached(token))["sub"] == "user-id"
+    assert (await decode_jwt_cached(token))["sub"] == "user-id"
+    assert len(calls) == 1
+
+    # запись кеша действительна только для ключа, которым токен проверен,
+    # и проверка другим ключом не сбрасывает записи остальных ключей
+    other_token = jwt.encode({"sub": "user-id"}, "other-key", algorithm="HS256")
+    with pytest.raises(jwt.InvalidSignatureError):
+        await decode_jwt_cached(other_token)
+    assert (await decode_jwt_cached(other_token, key="other-key"))["sub"] == "user-id"
+    with pytest.raises(jwt.InvalidSignatureError):
+        await decode_jwt_cached(token, key="other-key")
+    await decode_jwt_cached(token)
+    await decode_jwt_cached(other_token, key="other-key")
+    assert len(calls) == 4
+
+    # срок действия токена проверяется и для записей кеша
+    expired_token = await create_jwt(user="user-id", expire_minutes=5)
+    await decode_jwt_cached(expired_token)
+    key_id = hashlib.sha256(
+        f"{setting.auth_jwt.algorithm}:{setting_conn.SECRET_KEY}".encode()
+    ).hexdigest()
+    digest = f"{key_id}:{hashlib.sha256(expired_token.encode()).hexdigest()}"
+    payload = jwt_utils.token_cache.get(digest)
+    jwt_utils.token_cache.set(digest, {**payload, "exp": time.time() - 1})
+    with pytest.raises(jwt.ExpiredSignatureError):
+        await decode_jwt_cached(expired_token)
@@ -0,0 +1,82 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from src.core import database
+from src.core.config import DbSetting
+from src.core.jwt_utils import token_cache
+from src.users.cache import user_cache
+from src.users.models import User
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+@pytest_asyncio.fixture(loop_scope="session", scope="function")
+async def replica(
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncGenerator[list[str], None]:
+    # реплика - отдельный движок на той же тестовой базе
+    engine: AsyncEngine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    monkeypatch.setattr(
+        database,
+        "replica_session_maker",
+        async_sessionmaker(engine, expire_on_commit=False),
+    )
+    yield statements
+    await engine.dispose()
+
+
+async def test_read_only_routes_use_replica(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+    test_user_admin: User,
+    replica: list[str],
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    user_cache.clear()
+    token_cache.clear()
+
+    response = await client.get("/users/list", headers=headers)
+    assert response.status_code == 200
+    # с реплики читается только список пользователей: пользователь для
+    # авторизации при промахе кеша читается с основной базы, иначе отстающая
+    # реплика вернула бы в кеш права до изменения
+    assert len(replica) == 1
+    assert "FROM users" in replica[0]
+    assert user_cache.get(test_user_admin.id) is not None
+
+    response = await client.get("/files/list", headers=headers)
+    assert response.status_code == 200
+    assert "FROM files" in replica[-1]
+
+    # пользователь, прочитанный при авторизации, изменяется через основную сессию
+    user_cache.clear()
+    response = await client.patch(
+        f"/users/{test_user_admin.id}/",
+        json={"full_name": test_user_admin.full_name},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+
+def test_db_setting_legacy_env_names(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("URL", "postgresql+asyncpg://legacy/db")
+    monkeypatch.setenv("ECHO", "true")
+    assert DbSetting().url == "postgresql+asyncpg://legacy/db"
+    assert DbSetting().echo is True
+
+    monkeypatch.setenv("DB_URL", "postgresql+asyncpg://primary/db")
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    assert DbSetting().url == "postgresql+asyncpg://primary/db"
+    assert DbSetting().pool_size == 3
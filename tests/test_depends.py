@@ -0,0 +1,80 @@
+from uuid import uuid4
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.core.database import get_async_session
+from src.core.jwt_utils import token_cache
+from src.main import app
+from src.users.cache import user_cache
+from src.users.models import User
+
+
+@pytest.mark.parametrize(
+    "method,url,status_code,expected",
+    [
+        ("GET", "/users/me", 200, 1),
+        ("GET", "/users/list", 200, 2),
+        ("GET", "/files/list", 200, 2),
+        ("PATCH", "/users/{id_admin}/", 200, 2),
+        ("PATCH", "/users/{id_other}/", 200, 4),
+        ("DELETE", "/users/{id_other}/", 204, 5),
+    ],
+)
+async def test_statements_per_request(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+    db_engine: AsyncEngine,
+    db_session: AsyncSession,
+    test_user_admin: User,
+    method: str,
+    url: str,
+    status_code: int,
+    expected: int,
+):
+    other = User(full_name="Other", email=f"other_{uuid4().hex}@example.com")
+    db_session.add(other)
+    await db_session.commit()
+    url = url.format(id_admin=test_user_admin.id, id_other=other.id)
+
+    # каждый запрос получает новую сессию, как в рабочем приложении
+    session_maker = async_sessionmaker(db_engine, expire_on_commit=False)
+
+    async def _get_session():
+        async with session_maker() as session:
+            yield session
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    # холодный кеш: пользователь загружается из БД ровно один раз за запрос
+    user_cache.clear()
+    token_cache.clear()
+    app.dependency_overrides[get_async_session] = _get_session
+    event.listen(db_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = await client.request(
+            method,
+            url,
+            headers={"Authorization": f"Bearer {token_admin}"},
+            json=(
+                {"full_name": test_user_admin.full_name} if method == "PATCH" else None
+            ),
+        )
+    finally:
+        event.remove(
+            db_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+        app.dependency_overrides.pop(get_async_session)
+        if method != "DELETE":
+            await db_session.delete(other)
+            await db_session.commit()
+
+    assert response.status_code == status_code
+    assert len(statements) == expected, statements
@@ -1,7 +1,41 @@
 from httpx import AsyncClient
 from pathlib import Path
+import os
+import tempfile
+import threading
+import tracemalloc
 
 import asyncio
+import base64
+import errno
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.core.config import setting
+from src.core.exceptions import UniqueViolationError
+from src.files import resumable, utils
+from src.files.models import Blob, File, UploadSession
+from src.files.responses import MediaFileResponse
+from src.files.resumable import delete_expired_upload_sessions, get_session_path
+from src.files.utils import (
+    add_file_record,
+    add_file_records,
+    get_blob_path,
+    get_blob_tmp_path,
+    get_file_path,
+    promote_file,
+    stage_blob,
+    write_file_by_chunks,
+)
+from src.users.crud import delete_user_db
+from src.users.models import User
 
 
 async def test_unauthorized_access(
@@ -86,3 +120,664 @@ async def test_list_files_user(
 
     assert response.status_code == 200
     assert len(response.json()) == 1
+
+
+async def test_write_file_by_chunks_bounded_memory(
+    event_loop: asyncio.AbstractEventLoop,
+    tmp_path: Path,
+):
+    chunk_size = 64 * 1024
+    file_size = 32 * 1024 * 1024
+
+    with tempfile.TemporaryFile() as source:
+        for _ in range(file_size // chunk_size):
+            source.write(b"\x01" * chunk_size)
+        source.seek(0)
+
+        tracemalloc.start()
+        try:
+            size = await write_file_by_chunks(
+                source=source, path_file=tmp_path / "big.wav", chunk_size=chunk_size
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert size == file_size
+    assert (tmp_path / "big.wav").stat().st_size == file_size
+    assert peak < chunk_size * 16
+
+
+async def test_write_file_by_chunks_reads_disk_off_loop(
+    event_loop: asyncio.AbstractEventLoop,
+    tmp_path: Path,
+):
+    # чтение файла, сброшенного на диск, не выполняется в потоке цикла событий
+    threads: set[int] = set()
+
+    with tempfile.SpooledTemporaryFile(max_size=16) as source:
+        source.write(b"\x01" * 1024)
+        source.seek(0)
+        read = source.read
+
+        def tracked_read(size: int = -1) -> bytes:
+            threads.add(threading.get_ident())
+            return read(size)
+
+        source.read = tracked_read
+        size = await write_file_by_chunks(
+            source=source, path_file=tmp_path / "rolled.wav", chunk_size=256
+        )
+
+    assert size == 1024
+    assert threads and threading.get_ident() not in threads
+
+
+async def test_promote_file_strategies(
+    event_loop: asyncio.AbstractEventLoop,
+    tmp_path: Path,
+):
+    # хеш содержимого не отменяет копирование средствами ядра
+    data = b"\x02" * (3 * 1024 * 1024 + 17)
+
+    with tempfile.SpooledTemporaryFile(max_size=1024) as source:
+        source.write(data)
+        source.seek(0)
+        digest = hashlib.sha256()
+        strategy = await promote_file(
+            source=source, path_file=tmp_path / "disk.wav", digest=digest
+        )
+    assert strategy in ("copy_file_range", "sendfile")
+    assert (tmp_path / "disk.wav").read_bytes() == data
+    assert digest.hexdigest() == hashlib.sha256(data).hexdigest()
+
+    with tempfile.SpooledTemporaryFile(max_size=len(data) * 2) as source:
+        source.write(data)
+        source.seek(0)
+        digest = hashlib.sha256()
+        strategy = await promote_file(
+            source=source, path_file=tmp_path / "mem.wav", digest=digest
+        )
+    assert strategy == "chunks"
+    assert (tmp_path / "mem.wav").read_bytes() == data
+    assert digest.hexdigest() == hashlib.sha256(data).hexdigest()
+
+    named = tmp_path / "named.tmp"
+    named.write_bytes(data)
+    with open(named, "rb") as source:
+        digest = hashlib.sha256()
+        strategy = await promote_file(
+            source=source, path_file=tmp_path / "named.wav", digest=digest
+        )
+    assert strategy == "rename"
+    assert not named.exists()
+    assert (tmp_path / "named.wav").read_bytes() == data
+    assert digest.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+async def test_promote_file_short_kernel_copy(
+    event_loop: asyncio.AbstractEventLoop,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # copy_file_range, вернувший 0 до конца данных, не оставляет усечённый файл
+    data = b"\x05" * (2 * 1024 * 1024 + 5)
+    real_copy_file_range = os.copy_file_range
+    calls = 0
+
+    def short_copy_file_range(src, dst, count, offset_src=None, offset_dst=None):
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            return 0
+        return real_copy_file_range(src, dst, 1024, offset_src, offset_dst)
+
+    monkeypatch.setattr(os, "copy_file_range", short_copy_file_range)
+    with tempfile.SpooledTemporaryFile(max_size=1024) as source:
+        source.write(data)
+        source.seek(0)
+        strategy = await promote_file(source=source, path_file=tmp_path / "short.wav")
+    assert strategy in ("sendfile", "copy")
+    assert (tmp_path / "short.wav").read_bytes() == data
+
+
+async def test_load_file_raw(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    path_dir = Path(__file__).parent
+    content = (path_dir / "test_file.wav").read_bytes()
+
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    response = await client.put(
+        "/files/raw_test_file.wav", headers=headers, content=content
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"response": "OK"}
+
+    response = await client.put(
+        "/files/raw_test_file.wav", headers=headers, content=content
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Duplicate name files"}
+
+    response = await client.put(
+        "/files/raw_test_file.txt", headers=headers, content=content
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "invalid format file"}
+
+
+async def test_resumable_upload(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    path_dir = Path(__file__).parent
+    content = (path_dir / "test_file.wav").read_bytes()
+    half = len(content) // 2
+
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    response = await client.post(
+        "/files/uploads",
+        headers=headers,
+        json={"filename": "resumable_test_file.wav", "size": len(content)},
+    )
+    assert response.status_code == 201
+    upload_id = response.json()["id"]
+    assert response.json()["offset"] == 0
+
+    response = await client.put(
+        f"/files/uploads/{upload_id}",
+        headers=headers,
+        params={"offset": half},
+        content=content[half:],
+    )
+    assert response.status_code == 200
+    assert response.json()["offset"] == 0
+    assert response.json()["ranges"] == [[half, len(content)]]
+
+    response = await client.post(
+        f"/files/uploads/{upload_id}/complete", headers=headers
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "The file has not been fully uploaded"}
+
+    response = await client.put(
+        f"/files/uploads/{upload_id}",
+        headers=headers,
+        params={"offset": 0},
+        content=content[:half],
+    )
+    response = await client.get(f"/files/uploads/{upload_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["offset"] == len(content)
+
+    response = await client.post(
+        f"/files/uploads/{upload_id}/complete", headers=headers
+    )
+    assert response.status_code == 201
+
+    response = await client.get(f"/files/uploads/{upload_id}", headers=headers)
+    assert response.status_code == 404
+
+
+async def test_resumable_upload_limits_and_expiry(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    db_engine: AsyncEngine,
+    token_admin: str,
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    response = await client.post(
+        "/files/uploads",
+        headers=headers,
+        json={"filename": "too_big.wav", "size": setting.files.max_upload_size + 1},
+    )
+    assert response.status_code == 400
+
+    response = await client.post(
+        "/files/uploads",
+        headers=headers,
+        json={"filename": "expired_test_file.wav", "size": 16},
+    )
+    assert response.status_code == 201
+    upload_id = response.json()["id"]
+    session_path = get_session_path(UUID(upload_id))
+    assert session_path.stat().st_size == 16
+
+    # файла сессии нет (сессию завершают): блок данных отклоняется с 404
+    session_path.rename(session_path.with_suffix(".claimed"))
+    response = await client.put(
+        f"/files/uploads/{upload_id}",
+        headers=headers,
+        params={"offset": 0},
+        content=b"\x00" * 16,
+    )
+    assert response.status_code == 404
+    session_path.with_suffix(".claimed").rename(session_path)
+
+    async with AsyncSession(db_engine) as session:
+        deleted = await delete_expired_upload_sessions(
+            session=session,
+            expired_before=datetime.now(timezone.utc) + timedelta(seconds=1),
+        )
+    assert deleted >= 1
+    assert not session_path.exists()
+
+    response = await client.get(f"/files/uploads/{upload_id}", headers=headers)
+    assert response.status_code == 404
+
+
+async def test_resumable_upload_deleted_while_completing(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    db_engine: AsyncEngine,
+    token_admin: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    content = os.urandom(64)
+    response = await client.post(
+        "/files/uploads",
+        headers=headers,
+        json={"filename": "deleted_while_completing.wav", "size": len(content)},
+    )
+    upload_id = response.json()["id"]
+    await client.put(
+        f"/files/uploads/{upload_id}",
+        headers=headers,
+        params={"offset": 0},
+        content=content,
+    )
+
+    # сессию отменяют, пока её файл хешируется без блокировки строки
+    claimed: list[Path] = []
+    hash_blob_file = resumable.hash_blob_file
+
+    async def hash_and_cancel(path_file: Path) -> tuple[str, int]:
+        claimed.append(path_file)
+        async with AsyncSession(db_engine) as session:
+            await session.execute(
+                delete(UploadSession).where(UploadSession.id == UUID(upload_id))
+            )
+            await session.commit()
+        return await hash_blob_file(path_file)
+
+    monkeypatch.setattr(resumable, "hash_blob_file", hash_and_cancel)
+    response = await client.post(
+        f"/files/uploads/{upload_id}/complete", headers=headers
+    )
+    assert response.status_code == 404
+    assert not claimed[0].exists()
+    assert not get_session_path(UUID(upload_id)).exists()
+
+
+async def test_duplicate_content_stored_once(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    test_user_admin: User,
+):
+    content = os.urandom(2048)
+    sha256 = hashlib.sha256(content).hexdigest()
+    items = []
+    for filename in ("duplicate_first.wav", "duplicate_second.wav"):
+        tmp_path = get_blob_tmp_path()
+        tmp_path.write_bytes(content)
+        items.append((filename, sha256, len(content), tmp_path))
+
+    async with AsyncSession(db_engine) as session:
+        user = await session.get(User, test_user_admin.id)
+        blob = await session.get(Blob, sha256)
+        ref_count = 0 if blob is None else blob.ref_count
+
+        await add_file_records(session=session, user=user, items=items)
+
+        blob = await session.get(Blob, sha256, populate_existing=True)
+        stmt = select(File).filter(File.blob_sha256 == sha256)
+        res: Result = await session.execute(stmt)
+        files = res.scalars().all()
+
+        assert blob.ref_count - ref_count == len(files) == 2
+        assert get_blob_path(sha256).read_bytes() == content
+        assert all(get_file_path(file) == get_blob_path(sha256) for file in files)
+        assert all(
+            utils.BASE_DIR / file.path_file == get_blob_path(sha256) for file in files
+        )
+        assert not any(tmp_path.exists() for *_, tmp_path in items)
+
+        for file in files:
+            await session.delete(file)
+        await session.flush()
+        await session.delete(blob)
+        await session.commit()
+    get_blob_path(sha256).unlink()
+
+
+async def test_deleted_user_releases_unused_blobs(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    test_user_admin: User,
+):
+    own_content, shared_content = os.urandom(2048), os.urandom(2048)
+    own_sha256 = hashlib.sha256(own_content).hexdigest()
+    shared_sha256 = hashlib.sha256(shared_content).hexdigest()
+
+    def staged(filename: str, content: bytes) -> tuple[str, str, int, Path]:
+        tmp_path = get_blob_tmp_path()
+        tmp_path.write_bytes(content)
+        return filename, hashlib.sha256(content).hexdigest(), len(content), tmp_path
+
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        admin = await session.get(User, test_user_admin.id)
+        user = User(full_name="Leaving", email=f"leaving_{uuid4().hex}@example.com")
+        session.add(user)
+        await session.commit()
+        await add_file_records(
+            session=session,
+            user=user,
+            items=[
+                staged("own.wav", own_content),
+                staged("shared.wav", shared_content),
+            ],
+        )
+        shared_file = await add_file_record(
+            session=session,
+            user=admin,
+            filename="shared_with_leaving.wav",
+            sha256=shared_sha256,
+            size=len(shared_content),
+            tmp_path=staged("shared.wav", shared_content)[3],
+        )
+
+    # удаление пользователя, как в обработчике запроса: его файлы не загружены
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        user = await session.get(User, user.id)
+        await delete_user_db(session=session, user=user)
+
+        assert await session.get(Blob, own_sha256) is None
+        assert not get_blob_path(own_sha256).exists()
+        blob = await session.get(Blob, shared_sha256, populate_existing=True)
+        assert blob.ref_count == 1
+        assert get_blob_path(shared_sha256).read_bytes() == shared_content
+
+        await session.delete(shared_file)
+        await session.flush()
+        await session.delete(blob)
+        await session.commit()
+    get_blob_path(shared_sha256).unlink()
+
+
+async def test_failed_registration_leaves_no_blob(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    test_user_admin: User,
+):
+    content = os.urandom(4096)
+    sha256 = hashlib.sha256(content).hexdigest()
+    tmp_path = get_blob_tmp_path()
+    tmp_path.write_bytes(content)
+
+    async with AsyncSession(db_engine) as session:
+        user = await session.get(User, test_user_admin.id)
+        try:
+            await add_file_record(
+                session=session,
+                user=user,
+                filename="new_test_file.wav",
+                sha256=sha256,
+                size=len(content),
+                tmp_path=tmp_path,
+            )
+        except UniqueViolationError:
+            pass
+        else:
+            raise AssertionError("duplicate file name was registered")
+        assert await session.get(Blob, sha256) is None
+
+    assert not tmp_path.exists()
+    assert not get_blob_path(sha256).exists()
+
+
+async def test_failed_placement_leaves_no_record(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    test_user_admin: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def place_blobs(items):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(utils, "_place_blobs", place_blobs)
+    content = os.urandom(4096)
+    sha256 = hashlib.sha256(content).hexdigest()
+    tmp_path = get_blob_tmp_path()
+    tmp_path.write_bytes(content)
+
+    async with AsyncSession(db_engine) as session:
+        user = await session.get(User, test_user_admin.id)
+        with pytest.raises(OSError):
+            await add_file_record(
+                session=session,
+                user=user,
+                filename="placement_failed.wav",
+                sha256=sha256,
+                size=len(content),
+                tmp_path=tmp_path,
+            )
+        res: Result = await session.execute(
+            select(File).filter(File.filename == "placement_failed.wav")
+        )
+        assert res.first() is None
+        assert await session.get(Blob, sha256) is None
+
+    assert not tmp_path.exists()
+
+
+async def test_stage_blob_hashes_while_writing(
+    event_loop: asyncio.AbstractEventLoop,
+):
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    for source in (
+        tempfile.SpooledTemporaryFile(max_size=len(content) + 1),
+        tempfile.TemporaryFile(),
+    ):
+        with source:
+            source.write(content)
+            source.seek(0)
+            sha256, size, tmp_path = await stage_blob(source=source)
+        assert (sha256, size) == (hashlib.sha256(content).hexdigest(), len(content))
+        assert tmp_path.read_bytes() == content
+        assert not get_blob_path(sha256).exists()
+        tmp_path.unlink()
+
+
+async def test_download_file(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    path_dir = Path(__file__).parent
+    content = (path_dir / "test_file.wav").read_bytes()
+
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    response = await client.get("/files/list", headers=headers)
+    file_id = next(
+        item["id"]
+        for item in response.json()
+        if item["filename"] == "new_test_file.wav"
+    )
+
+    response = await client.get(f"/files/{file_id}/download", headers=headers)
+    assert response.status_code == 200
+    assert response.content == content
+    etag = response.headers["etag"]
+
+    response = await client.get(
+        f"/files/{file_id}/download", headers={**headers, "Range": "bytes=10-109"}
+    )
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-109/{len(content)}"
+    assert response.content == content[10:110]
+
+    response = await client.get(
+        f"/files/{file_id}/download", headers={**headers, "Range": "bytes=0-9,100-199"}
+    )
+    assert response.status_code == 206
+    assert content[:10] in response.content
+    assert content[100:200] in response.content
+
+    response = await client.get(
+        f"/files/{file_id}/download", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+async def test_download_file_zerocopy(
+    event_loop: asyncio.AbstractEventLoop,
+    tmp_path: Path,
+):
+    path_file = tmp_path / "zerocopy.wav"
+    path_file.write_bytes(b"\x03" * 1000)
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {
+                **message,
+                "body": os.pread(
+                    message["file"].fileno(), message["count"], message["offset"]
+                ),
+            }
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"range", b"bytes=100-199")],
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    response = MediaFileResponse(path_file, stat_result=os.stat(path_file))
+    await response(scope, receive, send)
+
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert messages[1]["offset"] == 100
+    assert messages[1]["body"] == b"\x03" * 100
+
+
+async def test_list_files_pagination(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    params = {"limit": 2, "sort_by": "filename", "order": "desc"}
+    response = await client.get("/files/list", headers=headers, params=params)
+
+    assert response.status_code == 200
+    assert [item["filename"] for item in response.json()] == [
+        "resumable_test_file.wav",
+        "raw_test_file.wav",
+    ]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await client.get(
+        "/files/list", headers=headers, params={**params, "cursor": cursor}
+    )
+
+    assert response.status_code == 200
+    assert [item["filename"] for item in response.json()] == ["new_test_file.wav"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = await client.get(
+        "/files/list", headers=headers, params={"cursor": "bad"}
+    )
+
+    assert response.status_code == 400
+
+    # корректный base64 JSON с полями не тех типов
+    for fields in ([5, str(uuid4())], ["a.wav", 5], {"a": 1}, ["a.wav"]):
+        cursor = base64.urlsafe_b64encode(json.dumps(fields).encode()).decode()
+        response = await client.get(
+            "/files/list",
+            headers=headers,
+            params={"cursor": cursor, "sort_by": "filename"},
+        )
+        assert response.status_code == 400, fields
+        assert response.json() == {"detail": "invalid cursor"}
+
+    filenames = []
+    params = {"limit": 1}
+    while True:
+        response = await client.get("/files/list", headers=headers, params=params)
+        filenames.extend(item["filename"] for item in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert sorted(filenames) == [
+        "new_test_file.wav",
+        "raw_test_file.wav",
+        "resumable_test_file.wav",
+    ]
+
+
+async def test_load_files_batch(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    path_dir = Path(__file__).parent
+    file_name = str(path_dir / "test_file.wav")
+
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    files = [
+        ("upload_files", ("first.wav", open(file_name, "rb"), "audio/wav")),
+        ("upload_files", ("second.flac", b"\x04" * 2048, "audio/flac")),
+        ("upload_files", ("third.txt", b"text", "text/plain")),
+        ("upload_files", ("fourth.wav", open(file_name, "rb"), "audio/wav")),
+        ("upload_files", ("fifth.wav", open(file_name, "rb"), "audio/wav")),
+    ]
+    data = {
+        "new_names_files": [
+            "batch_first",
+            "batch_second",
+            "batch_third",
+            "new_test_file",
+            "batch_first",
+        ]
+    }
+    response = await client.post(
+        "/files/load-batch", headers=headers, files=files, data=data
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"filename": "batch_first.wav", "status": "OK", "detail": None},
+        {"filename": "batch_second.flac", "status": "OK", "detail": None},
+        {"filename": "batch_third", "status": "error", "detail": "invalid format file"},
+        {
+            "filename": "new_test_file.wav",
+            "status": "error",
+            "detail": "Duplicate name files",
+        },
+        {
+            "filename": "batch_first.wav",
+            "status": "error",
+            "detail": "Duplicate name files",
+        },
+    ]
+
+    response = await client.get("/files/list", headers=headers)
+    filenames = [item["filename"] for item in response.json()]
+    assert "batch_first.wav" in filenames
+    assert "batch_second.flac" in filenames
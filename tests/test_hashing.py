@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.core.executor import BoundedExecutor
+from src.core.exceptions import ServerBusy
+from src.core.jwt_utils import create_hash_password, validate_password
+
+
+async def test_bounded_executor_rejects_when_full(
+    event_loop: asyncio.AbstractEventLoop,
+):
+    executor = BoundedExecutor(name="test", workers=1, max_pending=2)
+    labels = {"executor": "test"}
+    release = threading.Event()
+    try:
+        tasks = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        assert executor.stats().pending == 2
+        assert executor.stats().active == 1
+        assert executor.stats().queued == 1
+        assert REGISTRY.get_sample_value("executor_pending_tasks", labels) == 2
+        assert REGISTRY.get_sample_value("executor_active_tasks", labels) == 1
+        with pytest.raises(ServerBusy):
+            await executor.run(release.wait)
+        assert executor.stats().rejected == 1
+        assert REGISTRY.get_sample_value("executor_rejected_total", labels) == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert executor.stats().pending == 0
+        assert executor.stats().completed == 2
+        assert REGISTRY.get_sample_value("executor_pending_tasks", labels) == 0
+
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0)
+        assert executor.stats().completed == 2
+        assert executor.stats().failed == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+async def test_password_hashing_does_not_block_event_loop(
+    event_loop: asyncio.AbstractEventLoop,
+):
+    hashed_password = await create_hash_password("1qaz!QAZ")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        validate_password(password="1qaz!QAZ", hashed_password=hashed_password),
+        validate_password(password="wrong", hashed_password=hashed_password),
+        create_hash_password("1qaz!QAZ"),
+    )
+    elapsed = time.perf_counter() - start
+    task.cancel()
+
+    assert results[0] is True
+    assert results[1] is False
+    # цикл событий продолжал обслуживать другие задачи во время хеширования
+    assert ticks >= elapsed / 0.005 / 2
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import ClientResponseError
+from httpx import AsyncClient
+
+from src.auth import routers as auth_routers
+from src.auth.utils import get_yandex_user_data
+from src.core.config import setting
+
+
+async def test_yandex_user_data_pooled(
+    event_loop: asyncio.AbstractEventLoop,
+    yandex_stub,
+):
+    yandex_stub.users = {
+        f"token-{i}": {"default_email": f"user{i}@example.com", "real_name": "User"}
+        for i in range(200)
+    }
+
+    start: float = time.perf_counter()
+    results = await asyncio.gather(
+        *(get_yandex_user_data(f"token-{i}") for i in range(200))
+    )
+    elapsed: float = time.perf_counter() - start
+
+    assert [r["default_email"] for r in results] == [
+        f"user{i}@example.com" for i in range(200)
+    ]
+    assert yandex_stub.requests == 200
+    # соединения переиспользуются, их число ограничено пулом
+    assert len(yandex_stub.peers) <= setting.http.limit_per_host
+    # заглушка локальная, граница с запасом для медленных CI-машин
+    assert elapsed < 5, elapsed
+
+
+async def test_yandex_user_data_retry(
+    event_loop: asyncio.AbstractEventLoop,
+    yandex_stub,
+):
+    yandex_stub.users = {"token": {"default_email": "user@example.com"}}
+
+    yandex_stub.fail_next = setting.http.retries
+    result = await get_yandex_user_data("token")
+    assert result["default_email"] == "user@example.com"
+    assert yandex_stub.requests == setting.http.retries + 1
+
+    yandex_stub.fail_next = setting.http.retries + 1
+    with pytest.raises(ClientResponseError) as exp:
+        await get_yandex_user_data("token")
+    assert exp.value.status == 503
+
+    # ошибки клиента не повторяются
+    requests: int = yandex_stub.requests
+    with pytest.raises(ClientResponseError) as exp:
+        await get_yandex_user_data("unknown")
+    assert exp.value.status == 401
+    assert yandex_stub.requests == requests + 1
+
+
+async def test_yandex_login_maps_upstream_errors(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    yandex_stub,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def _get_access_token(request):
+        return {"access_token": "expired"}
+
+    monkeypatch.setattr(auth_routers, "get_access_token", _get_access_token)
+
+    response = await client.get("/auth/yandex")
+    assert response.status_code == 401
+
+    yandex_stub.fail_next = setting.http.retries + 1
+    response = await client.get("/auth/yandex")
+    assert response.status_code == 502
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.jwt_utils import validate_password
+from src.users.models import User
+from src.utils.import_users import ImportStats, import_users
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+async def test_import_users(
+    event_loop: asyncio.AbstractEventLoop,
+    db_session: AsyncSession,
+    tmp_path: Path,
+):
+    existing = User(full_name="Existing", email="import_existing@example.com")
+    db_session.add(existing)
+    await db_session.commit()
+
+    path_csv: Path = tmp_path / "users.csv"
+    path_csv.write_text(
+        "full_name,email,password,is_superuser\n"
+        "Existing,import_existing@example.com,1qaz!QAZ,\n"
+        "User One,import_1@example.com,1qaz!QAZ,\n"
+        "User Two,import_2@example.com,2wsx@WSX,true\n"
+        "User One,import_1@example.com,1qaz!QAZ,\n"
+        "Bad,import_bad@example.com,password,\n"
+    )
+    path_jsonl: Path = tmp_path / "users.jsonl"
+    path_jsonl.write_text(
+        "\n".join(
+            json.dumps(row)
+            for row in [
+                {
+                    "full_name": "Renamed",
+                    "email": "import_existing@example.com",
+                    "password": "3edc$EDC",
+                },
+                {
+                    "full_name": "User Three",
+                    "email": "import_3@example.com",
+                    "password": "3edc$EDC",
+                },
+            ]
+        )
+        + '\n{"full_name": "Broken", "email": \n'
+    )
+    emails = [f"import_{i}@example.com" for i in ("existing", 1, 2, 3)]
+
+    try:
+        stats: ImportStats = await import_users(
+            path=path_csv, workers=2, batch_size=2, url=SQLALCHEMY_DATABASE_URL
+        )
+        assert (stats.read, stats.invalid, stats.duplicates) == (5, 1, 1)
+        assert (stats.skipped, stats.inserted, stats.updated) == (1, 2, 0)
+
+        stats = await import_users(
+            path=path_jsonl,
+            on_conflict="update",
+            workers=2,
+            url=SQLALCHEMY_DATABASE_URL,
+        )
+        assert (stats.read, stats.invalid) == (3, 1)
+        assert (stats.skipped, stats.inserted, stats.updated) == (0, 1, 1)
+
+        db_session.expunge_all()
+        res = await db_session.execute(
+            select(User).where(User.email.in_(emails)).order_by(User.email)
+        )
+        users = {user.email: user for user in res.scalars()}
+        assert users["import_existing@example.com"].full_name == "Renamed"
+        assert await validate_password(
+            "3edc$EDC", users["import_existing@example.com"].hashed_password.encode()
+        )
+        assert await validate_password(
+            "2wsx@WSX", users["import_2@example.com"].hashed_password.encode()
+        )
+        assert users["import_2@example.com"].is_superuser
+        assert not users["import_1@example.com"].is_superuser
+    finally:
+        await db_session.execute(delete(User).where(User.email.in_(emails)))
+        await db_session.commit()
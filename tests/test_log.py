@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+import queue
+
+from httpx import AsyncClient
+
+from src.core.log import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RequestIdFilter,
+    SamplingFilter,
+    request_id_var,
+)
+
+
+def make_record(level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(
+        "src.test", level, __file__, 1, "User request by id %s", ("42",), None
+    )
+
+
+def test_json_formatter_with_request_id():
+    token = request_id_var.set("req-1")
+    try:
+        record = make_record()
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "User request by id 42"
+    assert data["request_id"] == "req-1"
+    assert data["level"] == "INFO"
+
+
+def test_sampling_filter():
+    sampling = SamplingFilter(rate=0.1)
+    kept = sum(sampling.filter(make_record()) for _ in range(1000))
+    assert kept == 100
+    # предупреждения и ошибки не отбрасываются
+    assert all(sampling.filter(make_record(logging.WARNING)) for _ in range(100))
+
+    # решение одинаково для всех записей одного запроса
+    decisions = set()
+    for _ in range(10):
+        record = make_record()
+        record.request_id = "req-2"
+        decisions.add(sampling.filter(record))
+    assert len(decisions) == 1
+
+
+def test_queue_handler_does_not_block():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+async def test_request_id_header(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+):
+    response = await client.get("/", headers={"X-Request-ID": "client-id"})
+    assert response.headers["X-Request-ID"] == "client-id"
+
+    response = await client.get("/")
+    assert len(response.headers["X-Request-ID"]) == 32
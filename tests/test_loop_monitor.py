@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from src.core.config import LoopMonitorSetting
+from src.core.loop_monitor import LoopMonitor, loop_monitor
+from src.core.metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG, EVENT_LOOP_LAG_QUANTILE
+
+
+def _block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _sample(metric, name: str, **labels) -> float:
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    return 0.0
+
+
+@pytest.mark.blocks_event_loop
+async def test_loop_monitor_detects_blocking_call():
+    monitor = LoopMonitor(LoopMonitorSetting(interval=0.01, threshold=0.05))
+    lag_count = _sample(EVENT_LOOP_LAG, "event_loop_lag_seconds_count")
+    blocked = _sample(EVENT_LOOP_BLOCKED, "event_loop_blocked_total")
+
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _block_loop(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert len(monitor.stalls) == 1
+    stall = monitor.stalls[0]
+    assert "_block_loop" in stall.stack
+    assert "time.sleep" in stall.stack
+    assert stall.duration is not None and stall.duration >= 0.2
+    assert _sample(EVENT_LOOP_BLOCKED, "event_loop_blocked_total") == blocked + 1
+    assert _sample(EVENT_LOOP_LAG, "event_loop_lag_seconds_count") > lag_count
+    p99 = _sample(
+        EVENT_LOOP_LAG_QUANTILE, "event_loop_lag_quantile_seconds", quantile="0.99"
+    )
+    assert p99 >= 0.2
+
+
+async def test_loop_monitor_quiet_loop():
+    monitor = LoopMonitor(LoopMonitorSetting(interval=0.01, threshold=0.2))
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert not monitor.stalls
+    assert monitor.lags
+    assert monitor.quantiles()[0.5] < 0.2
+
+
+async def test_loop_stalls_admin_only(client: AsyncClient, token_admin: str):
+    response = await client.get(
+        "/admin/loop-stalls", headers={"Authorization": f"Bearer {token_admin}"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == len(loop_monitor.stalls)
+
+    client.cookies.clear()
+    response = await client.get("/admin/loop-stalls")
+    assert response.status_code == 401
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.core.metrics import InstrumentedPool, render_metrics
+from src.core.query_stats import instrument_engine
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def test_route_metrics(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+    db_engine: AsyncEngine,
+):
+    instrument_engine(db_engine)
+    labels = {"method": "GET", "route": "/users/list"}
+    count: float = sample("http_request_duration_seconds_count", status="200", **labels)
+    queries: float = sample("http_request_db_queries_sum", **labels)
+
+    response = await client.get(
+        "/users/list", headers={"Authorization": f"Bearer {token_admin}"}
+    )
+    assert response.status_code == 200
+
+    assert (
+        sample("http_request_duration_seconds_count", status="200", **labels)
+        == count + 1
+    )
+    assert sample("http_request_db_queries_sum", **labels) > queries
+    assert sample("http_response_size_bytes_sum", **labels) >= len(response.content)
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET"' in response.text
+    assert 'route="/users/list"' in response.text
+
+
+async def test_pool_checkout_wait(event_loop: asyncio.AbstractEventLoop):
+    engine: AsyncEngine = create_async_engine(
+        SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedPool
+    )
+    count: float = sample("db_pool_checkout_wait_seconds_count")
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+    assert sample("db_pool_checkout_wait_seconds_count") == count + 1
+
+
+def test_metrics_aggregated_across_processes(tmp_path: Path):
+    # два процесса, как два воркера gunicorn, пишут метрики в общий каталог
+    code = (
+        "from src.core.metrics import REQUEST_LATENCY;"
+        "REQUEST_LATENCY.labels('GET', '/test', '200').observe(0.1)"
+    )
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    root = Path(__file__).parent.parent
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", code], env=env, cwd=root, check=True)
+
+    content, _ = render_metrics(multiproc_dir=str(tmp_path))
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/test",status="200"} 2.0'
+        in content.decode()
+    )
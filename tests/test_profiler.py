@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+import pytest
+from httpx import AsyncClient
+
+from src.core.jwt_utils import create_jwt
+from src.core.profiler import (
+    PROFILE_HEADER,
+    RequestProfile,
+    _Sampler,
+    profile_store,
+)
+from src.users.models import User
+
+
+async def test_profile_by_signed_header(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+    test_user_admin: User,
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    profile_store.clear()
+
+    response = await client.post("/admin/profiles/token", headers=headers)
+    assert response.status_code == 201
+    assert response.json()["header"] == PROFILE_HEADER
+    profile_token: str = response.json()["token"]
+
+    # access-токен и неверная подпись не включают профилирование
+    for token in (await create_jwt(str(test_user_admin.id)), profile_token + "x"):
+        await client.get("/users/me", headers={PROFILE_HEADER: token})
+    assert profile_store.list() == []
+
+    # вход по паролю: основное время - ожидание bcrypt в пуле потоков
+    response = await client.post(
+        "/token",
+        data={"username": test_user_admin.email, "password": "1qaz!QAZ"},
+        headers={PROFILE_HEADER: profile_token},
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/admin/profiles", headers=headers)
+    assert response.status_code == 200
+    profiles = response.json()
+    assert len(profiles) == 1
+    assert profiles[0]["path"] == "/token"
+    assert profiles[0]["status"] == 200
+    assert profiles[0]["samples"] > 0
+
+    response = await client.get(f"/admin/profiles/{profiles[0]['id']}", headers=headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiles[0]["samples"]
+    assert any(
+        "login_for_access_token" in line and "[awaiting]" in line for line in lines
+    )
+
+
+async def test_profile_sampling(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    profile_store.clear()
+
+    response = await client.put(
+        "/admin/profiles/sampling", json={"sample_rate": 1}, headers=headers
+    )
+    assert response.status_code == 200
+    try:
+        await client.get("/users/me", headers=headers)
+    finally:
+        await client.put(
+            "/admin/profiles/sampling", json={"sample_rate": 0}, headers=headers
+        )
+    assert "/users/me" in [p.path for p in profile_store.list()]
+
+    client.cookies.clear()
+    response = await client.get("/admin/profiles")
+    assert response.status_code == 401
+
+
+def _block_loop() -> None:
+    time.sleep(0.2)
+
+
+async def _request(work: Optional[Callable[[], None]]) -> None:
+    await asyncio.sleep(0.01)
+    if work is not None:
+        work()
+    await asyncio.sleep(0.2)
+
+
+@pytest.mark.blocks_event_loop
+async def test_concurrent_profiles_are_not_mixed(
+    event_loop: asyncio.AbstractEventLoop,
+):
+    # обе задачи выполняют один и тот же код, как ProfilerMiddleware._run
+    profiles: list[RequestProfile] = []
+    samplers: list[_Sampler] = []
+    tasks: list[asyncio.Task] = []
+    for work in (_block_loop, None):
+        profile = RequestProfile(method="GET", path="/", interval=0.005)
+        task = asyncio.create_task(_request(work))
+        sampler = _Sampler(profile=profile, task=task)
+        sampler.start()
+        profiles.append(profile)
+        samplers.append(sampler)
+        tasks.append(task)
+
+    await asyncio.gather(*tasks)
+    for sampler in samplers:
+        sampler.stopped.set()
+        await asyncio.to_thread(sampler.join)
+
+    blocking, waiting = (profile.folded() for profile in profiles)
+    assert "_block_loop" in blocking
+    assert "_block_loop" not in waiting
+    assert "[awaiting]" in waiting
@@ -0,0 +1,105 @@
+from uuid import uuid4
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.exceptions import NotFindFile
+from src.files.utils import check_file_name, get_file_by_id, list_files
+from src.users.crud import find_user_by_email, get_user_by_id
+from src.users.models import User
+
+PLANNER_OPTIONS = ("enable_seqscan", "enable_bitmapscan", "enable_sort")
+
+
+async def capture_statements(db_session: AsyncSession, query) -> list[tuple]:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append((statement, parameters))
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await query()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+async def explain(db_session: AsyncSession, statement: str, parameters) -> str:
+    connection = await db_session.connection()
+    # на маленьких тестовых таблицах планировщик предпочтёт seq scan и сортировку,
+    # поэтому проверяем, что индекс может обслужить и фильтр, и порядок записей
+    for option in PLANNER_OPTIONS:
+        await connection.exec_driver_sql(f"SET {option} = off")
+    try:
+        result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return "\n".join(row[0] for row in result)
+    finally:
+        for option in PLANNER_OPTIONS:
+            await connection.exec_driver_sql(f"RESET {option}")
+
+
+async def find_file_by_id(db_session: AsyncSession, user_id):
+    try:
+        await get_file_by_id(session=db_session, user_id=user_id, file_id=uuid4())
+    except NotFindFile:
+        pass
+
+
+@pytest.mark.parametrize(
+    "query,index",
+    [
+        (
+            lambda s, u: list_files(session=s, user_id=u.id),
+            "idx_files_user_id_registered_at",
+        ),
+        (
+            lambda s, u: list_files(session=s, user_id=u.id, sort_by="filename"),
+            "idx_files_user_id_filename",
+        ),
+        (
+            lambda s, u: list_files(session=s, user_id=u.id, order="desc"),
+            "idx_files_user_id_registered_at",
+        ),
+        (
+            lambda s, u: check_file_name(session=s, user_id=u.id, filename="a.wav"),
+            ("idx_unique_filename_user", "idx_files_user_id_filename"),
+        ),
+        (lambda s, u: find_file_by_id(s, u.id), "files_pkey"),
+        (
+            lambda s, u: find_user_by_email(session=s, email=u.email),
+            "ix_users_email",
+        ),
+        (lambda s, u: get_user_by_id(session=s, id_user=uuid4()), "users_pkey"),
+    ],
+    ids=[
+        "list_files",
+        "list_files_by_filename",
+        "list_files_desc",
+        "check_file_name",
+        "get_file_by_id",
+        "find_user_by_email",
+        "get_user_by_id",
+    ],
+)
+async def test_hot_queries_use_index(
+    event_loop: asyncio.AbstractEventLoop,
+    db_session: AsyncSession,
+    test_user_admin: User,
+    query,
+    index: str | tuple[str, ...],
+):
+    statements = await capture_statements(
+        db_session, lambda: query(db_session, test_user_admin)
+    )
+
+    assert statements
+    for statement, parameters in statements:
+        plan = await explain(db_session, statement, parameters)
+        indexes = (index,) if isinstance(index, str) else index
+        assert any(f" {name} " in plan for name in indexes), plan
+        assert "Seq Scan" not in plan, plan
+        assert "Sort" not in plan, plan
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.core.config import setting
+from src.core.query_stats import (
+    RequestQueries,
+    _request_queries,
+    instrument_engine,
+    redact_parameters,
+)
+from src.users.models import User
+
+
+@pytest.fixture
+def query_log_config():
+    slow_ms: float = setting.query_log.slow_ms
+    threshold: int = setting.query_log.n_plus_one_threshold
+    yield setting.query_log
+    setting.query_log.slow_ms = slow_ms
+    setting.query_log.n_plus_one_threshold = threshold
+
+
+def test_redact_parameters():
+    assert redact_parameters(("secret@example.com", 10)) == ["str", "int"]
+    assert redact_parameters({"email": "secret@example.com"}) == {"email": "str"}
+
+
+async def test_server_timing(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+    db_engine: AsyncEngine,
+):
+    instrument_engine(db_engine)
+    response = await client.get(
+        "/users/list", headers={"Authorization": f"Bearer {token_admin}"}
+    )
+    assert response.status_code == 200
+    timing = re.fullmatch(
+        r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=([\d.]+)',
+        response.headers["Server-Timing"],
+    )
+    assert timing is not None
+    assert int(timing.group(2)) >= 1
+    assert float(timing.group(1)) <= float(timing.group(3))
+
+
+async def test_slow_query_and_n_plus_one_log(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    db_session: AsyncSession,
+    query_log_config,
+    caplog: pytest.LogCaptureFixture,
+):
+    instrument_engine(db_engine)
+    query_log_config.slow_ms = 0
+    query_log_config.n_plus_one_threshold = 2
+    token = _request_queries.set(
+        RequestQueries(scope={"method": "GET", "path": "/test"})
+    )
+    try:
+        with caplog.at_level(logging.WARNING, logger="src.core.query_stats"):
+            for _ in range(3):
+                await db_session.execute(
+                    select(User.id).where(User.email == "secret@example.com")
+                )
+    finally:
+        queries: RequestQueries = _request_queries.get()
+        _request_queries.reset(token)
+
+    assert queries.count == 3
+    assert "secret@example.com" not in caplog.text
+    assert "Slow query" in caplog.text
+    assert caplog.text.count("Possible N+1 in GET /test") == 1
@@ -0,0 +1,170 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.auth import rate_limit
+from src.auth.models import RateLimitBucket
+from src.auth.rate_limit import (
+    LoginRateLimiter,
+    MemoryBucketStore,
+    PostgresBucketStore,
+)
+from src.core.config import setting, RateLimitSetting
+from src.core.exceptions import TooManyRequests
+
+
+async def test_memory_bucket_store(event_loop: asyncio.AbstractEventLoop):
+    store = MemoryBucketStore(max_keys=10)
+
+    assert [await store.take("key", capacity=3, rate=1) for _ in range(3)] == [0] * 3
+    wait: float = await store.take("key", capacity=3, rate=1)
+    assert 0 < wait <= 1
+    assert await store.take("other", capacity=3, rate=1) == 0
+
+    await asyncio.sleep(wait)
+    assert await store.take("key", capacity=3, rate=1) == 0
+
+
+async def test_postgres_bucket_store(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+):
+    store = PostgresBucketStore(db_engine=db_engine)
+    key: str = f"test:{uuid4().hex}"
+
+    assert [await store.take(key, capacity=3, rate=1) for _ in range(3)] == [0] * 3
+    wait: float = await store.take(key, capacity=3, rate=1)
+    assert 0 < wait <= 1
+
+    await asyncio.sleep(wait)
+    assert await store.take(key, capacity=3, rate=1) == 0
+    await store.clear()
+
+
+async def test_postgres_bucket_store_purges_full_buckets(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+):
+    store = PostgresBucketStore(db_engine=db_engine, purge_interval=0)
+    limiter = LoginRateLimiter(store=store)
+    # ключ email не зависит от длины адреса
+    await limiter.check(email=f"{'a' * 400}@example.com", ip=None)
+
+    key: str = f"test:{uuid4().hex}"
+    assert await store.take(key, capacity=1, rate=10) == 0
+    await asyncio.sleep(0.2)
+    assert await store.take(f"test:{uuid4().hex}", capacity=1, rate=1) == 0
+    async with db_engine.connect() as conn:
+        result = await conn.execute(
+            select(RateLimitBucket.key).where(RateLimitBucket.key == key)
+        )
+        assert result.first() is None
+    await store.clear()
+
+
+async def test_login_rate_limiter_keys(event_loop: asyncio.AbstractEventLoop):
+    config = RateLimitSetting(
+        email_capacity=2, email_per_minute=1, ip_capacity=3, ip_per_minute=1
+    )
+    limiter = LoginRateLimiter(store=MemoryBucketStore(max_keys=10), config=config)
+
+    await limiter.check(email="a@example.com", ip="10.0.0.1")
+    await limiter.check(email="A@example.com ", ip="10.0.0.2")
+    with pytest.raises(TooManyRequests):
+        await limiter.check(email="a@example.com", ip="10.0.0.3")
+
+    # лимит по IP не зависит от email
+    await limiter.check(email="b@example.com", ip="10.0.0.4")
+    await limiter.check(email="c@example.com", ip="10.0.0.4")
+    await limiter.check(email="d@example.com", ip="10.0.0.4")
+    with pytest.raises(TooManyRequests) as exp:
+        await limiter.check(email="e@example.com", ip="10.0.0.4")
+    assert 0 < exp.value.retry_after <= 60
+
+
+async def test_login_rate_limited_before_db(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    db_engine: AsyncEngine,
+):
+    email: str = f"unknown_{uuid4().hex}@example.com"
+    for _ in range(setting.rate_limit.email_capacity):
+        response = await client.post(
+            "/token", data={"username": email, "password": "password"}
+        )
+        assert response.status_code == 400
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = await client.post(
+            "/token", data={"username": email, "password": "password"}
+        )
+        response_login = await client.post(
+            "/auth/login", json={"email": email, "password": "password"}
+        )
+    finally:
+        event.remove(
+            db_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response_login.status_code == 429
+    assert statements == []
+
+
+@pytest.mark.parametrize("backend", ["memory", "postgres"])
+async def test_rejected_login_does_not_spend_tokens(
+    event_loop: asyncio.AbstractEventLoop,
+    db_engine: AsyncEngine,
+    backend: str,
+):
+    config = RateLimitSetting(
+        email_capacity=1, email_per_minute=1, ip_capacity=1, ip_per_minute=1
+    )
+    if backend == "postgres":
+        store = PostgresBucketStore(db_engine=db_engine)
+    else:
+        store = MemoryBucketStore(max_keys=10)
+    limiter = LoginRateLimiter(store=store, config=config)
+    ip: str = f"10.1.{uuid4().int % 256}.1"
+    email: str = f"{uuid4().hex}@example.com"
+
+    await limiter.check(email=f"first_{email}", ip=ip)
+    with pytest.raises(TooManyRequests):
+        await limiter.check(email=email, ip=ip)
+    # запрос отклонен по IP, поэтому токен email не израсходован
+    await limiter.check(email=email, ip="10.2.0.1")
+    await store.clear()
+
+
+async def test_login_rate_limited_by_forwarded_ip(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    ips: list = []
+
+    async def check(email: str, ip):
+        ips.append(ip)
+
+    monkeypatch.setattr(rate_limit.login_limiter, "check", check)
+    email: str = f"unknown_{uuid4().hex}@example.com"
+    await client.post("/auth/login", json={"email": email, "password": "password"})
+    await client.post(
+        "/auth/login",
+        json={"email": email, "password": "password"},
+        headers={"X-Forwarded-For": "203.0.113.7"},
+    )
+
+    # тестовый клиент подключается с 127.0.0.1 - доверенного прокси
+    assert ips == ["127.0.0.1", "203.0.113.7"]
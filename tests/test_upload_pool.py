@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.core import database
+from src.core.config import COOKIE_NAME
+from src.core.database import get_async_session
+from src.core.jwt_utils import create_jwt, token_cache
+from src.files.models import File
+from src.main import app
+from src.users.cache import user_cache
+from src.users.models import User
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+SLOW_UPLOADS = 4
+CHUNKS = 10
+CHUNK_DELAY = 0.1
+
+
+async def slow_body() -> AsyncIterator[bytes]:
+    # медленный клиент: тело запроса приходит частями в течение ~1 секунды
+    for _ in range(CHUNKS):
+        await asyncio.sleep(CHUNK_DELAY)
+        yield os.urandom(16 * 1024)
+
+
+def single_connection_session_maker() -> async_sessionmaker[AsyncSession]:
+    engine: AsyncEngine = create_async_engine(
+        SQLALCHEMY_DATABASE_URL, pool_size=1, max_overflow=0, pool_timeout=0.5
+    )
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def list_files_during_slow_uploads(
+    session_maker: async_sessionmaker[AsyncSession],
+    cookies: dict[str, str],
+) -> list[float]:
+    async def _get_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = _get_session
+    try:
+        async with AsyncClient(app=app, base_url="http://") as client:
+            uploads = [
+                asyncio.create_task(
+                    client.put(
+                        f"/files/slow_{i}.wav", content=slow_body(), cookies=cookies
+                    )
+                )
+                for i in range(SLOW_UPLOADS)
+            ]
+            await asyncio.sleep(CHUNK_DELAY * 2)
+
+            latencies: list[float] = []
+            try:
+                while not all(task.done() for task in uploads):
+                    start: float = time.perf_counter()
+                    response = await client.get("/files/list", cookies=cookies)
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+                    await asyncio.sleep(CHUNK_DELAY)
+            finally:
+                for task in uploads:
+                    task.cancel()
+                responses = await asyncio.gather(*uploads, return_exceptions=True)
+    finally:
+        app.dependency_overrides.pop(get_async_session)
+
+    assert [getattr(r, "status_code", r) for r in responses] == [201] * SLOW_UPLOADS
+    return latencies
+
+
+async def test_slow_uploads_do_not_starve_pool(
+    event_loop: asyncio.AbstractEventLoop,
+    db_session: AsyncSession,
+):
+    user = User(full_name="Uploader", email=f"uploader_{uuid4().hex}@example.com")
+    db_session.add(user)
+    await db_session.commit()
+    cookies = {COOKIE_NAME: await create_jwt(str(user.id))}
+
+    # в пуле одно соединение: если загрузки его удерживают, список файлов ждёт
+    session_maker = single_connection_session_maker()
+    try:
+        latencies = await list_files_during_slow_uploads(session_maker, cookies)
+    finally:
+        await session_maker.kw["bind"].dispose()
+        await db_session.execute(delete(File).where(File.user_id == user.id))
+        await db_session.delete(user)
+        await db_session.commit()
+
+    assert len(latencies) >= 3
+    assert max(latencies) < 0.5, latencies
+
+
+async def test_slow_uploads_do_not_starve_replica_pool(
+    event_loop: asyncio.AbstractEventLoop,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    user = User(full_name="Uploader", email=f"uploader_{uuid4().hex}@example.com")
+    db_session.add(user)
+    await db_session.commit()
+    cookies = {COOKIE_NAME: await create_jwt(str(user.id))}
+
+    # в пуле реплики одно соединение, список файлов читается с реплики:
+    # загрузки не должны удерживать её соединение
+    replica_session_maker = single_connection_session_maker()
+    monkeypatch.setattr(database, "replica_session_maker", replica_session_maker)
+    primary_engine: AsyncEngine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+    user_cache.clear()
+    token_cache.clear()
+    try:
+        latencies = await list_files_during_slow_uploads(
+            async_sessionmaker(primary_engine, expire_on_commit=False), cookies
+        )
+    finally:
+        await replica_session_maker.kw["bind"].dispose()
+        await primary_engine.dispose()
+        await db_session.execute(delete(File).where(File.user_id == user.id))
+        await db_session.delete(user)
+        await db_session.commit()
+
+    assert len(latencies) >= 3
+    assert max(latencies) < 0.5, latencies
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.engine import Result
 import asyncio
+import json
 
 from src.users.models import User
 
@@ -111,6 +112,34 @@ async def test_user_list(
     assert len(response.json()) == 2
 
 
+async def test_user_list_pagination(
+    event_loop: asyncio.AbstractEventLoop,
+    client: AsyncClient,
+    token_admin: str,
+):
+    headers = {"Authorization": f"Bearer {token_admin}"}
+    response = await client.get("/users/list", params={"limit": 1}, headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page) == 1
+
+    response = await client.get(
+        "/users/list",
+        params={"limit": 1, "cursor": response.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert len(second_page) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+    response = await client.get("/users/list", params={"stream": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == first_page + second_page
+
+
 async def test_user_put(
     event_loop: asyncio.AbstractEventLoop,
     client: AsyncClient,